@@ -1,16 +1,22 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import pandas as pd
 import os
 
-# Mapowanie nazw kolumn z CSV na wynikowy XLSX/CSV
-COLUMN_MAPPING = {
-    "Kod": "Kod",
-    "ProduktNazwa": "ProduktNazwa",
-    "Cena": "Cena",
-    "VAT": "VAT"
-}
-TARGET_COLUMNS = ["Kod", "ProduktNazwa", "Cena", "VAT"]
+from column_finder import (
+    HEADER_CACHE_PATH,
+    MergeError,
+    MergeOptions,
+    MissingColumnsError,
+    merge_files,
+)
+
+# Wymagane kolumny CSV (ścisłe dopasowanie nazw) – column_finder/config.py
+OPTIONS = MergeOptions(
+    mapping="strict",
+    dedupe=True,
+    output_csv_encoding="cp1250",
+    header_cache=HEADER_CACHE_PATH
+)
 
 class CSVtoXLSXApp:
     def __init__(self, root):
@@ -65,48 +71,17 @@ class CSVtoXLSXApp:
             messagebox.showerror("Błąd", "Wybierz pliki CSV i plik docelowy")
             return
 
-        # wczytaj lub utwórz dane wynikowe
-        if os.path.exists(self.target_file):
-            target_df = pd.read_excel(self.target_file)
-        else:
-            target_df = pd.DataFrame(columns=TARGET_COLUMNS)
-
-        for file in self.csv_files:
-            try:
-                df = pd.read_csv(
-                    file,
-                    sep=";",
-                    header=0,
-                    encoding="cp1250",
-                    dtype=str,
-                    keep_default_na=False  # puste pola jako ""
-                )
-            except Exception as e:
-                messagebox.showerror("Błąd", f"Nie udało się wczytać pliku {os.path.basename(file)}: {e}")
-                return
-
-            # sprawdzamy kolumny i wybieramy tylko potrzebne
-            missing_cols = [col for col in COLUMN_MAPPING.keys() if col not in df.columns]
-            if missing_cols:
-                messagebox.showerror(
-                    "Błąd",
-                    f"Plik {os.path.basename(file)} nie zawiera wymaganych kolumn: {missing_cols}"
-                )
-                return
-
-            selected = df[list(COLUMN_MAPPING.keys())].rename(columns=COLUMN_MAPPING)
-            target_df = pd.concat([target_df, selected], ignore_index=True)
-
-        # sortowanie od ostatniego wpisu i zachowanie unikalnych Kodów
-        target_df = target_df.iloc[::-1].reset_index(drop=True)
-        target_df = target_df.drop_duplicates(subset="Kod", keep="first")
-
-        # zapis XLSX
-        target_df.to_excel(self.target_file, index=False)
-
-        # zapis CSV
-        csv_output = os.path.splitext(self.target_file)[0] + ".csv"
-        target_df.to_csv(csv_output, sep=";", index=False, encoding="cp1250")
+        try:
+            merge_files(self.csv_files, self.target_file, OPTIONS)
+        except MissingColumnsError as e:
+            messagebox.showerror(
+                "Błąd",
+                f"Plik {os.path.basename(e.path)} nie zawiera wymaganych kolumn: {e.missing}"
+            )
+            return
+        except MergeError as e:
+            messagebox.showerror("Błąd", f"Nie udało się wczytać pliku {os.path.basename(e.path)}: {e.reason}")
+            return
 
         messagebox.showinfo("OK", "Dane zostały zapisane do XLSX i CSV")
 
@@ -1,17 +1,23 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import pandas as pd
 import os
 #import openpyxl
 
-# Mapowanie nazw kolumn z CSV na wynikowy XLSX/CSV
-COLUMN_MAPPING = {
-    "Kod": "Kod",
-    "ProduktNazwa": "ProduktNazwa",
-    "Cena": "Cena",
-    "VAT": "VAT"
-}
-TARGET_COLUMNS = ["Kod", "ProduktNazwa", "Cena", "VAT"]
+from column_finder import (
+    HEADER_CACHE_PATH,
+    MergeError,
+    MergeOptions,
+    MissingColumnsError,
+    merge_files,
+)
+
+# Wymagane kolumny CSV (ścisłe dopasowanie nazw) – column_finder/config.py
+OPTIONS = MergeOptions(
+    mapping="strict",
+    dedupe=False,
+    output_csv_encoding="cp1250",
+    header_cache=HEADER_CACHE_PATH
+)
 
 class CSVtoXLSXApp:
     def __init__(self, root):
@@ -77,40 +83,17 @@ class CSVtoXLSXApp:
             )
             return
 
-        # wczytaj lub utwórz dane wynikowe
-        if os.path.exists(self.target_file):
-            target_df = pd.read_excel(self.target_file)
-        else:
-            target_df = pd.DataFrame(columns=TARGET_COLUMNS)
-
-        for file in self.csv_files:
-            df = pd.read_csv(
-                file,
-                sep=";",
-                header=0,
-                encoding="cp1250",
-                dtype=str
+        try:
+            merge_files(self.csv_files, self.target_file, OPTIONS)
+        except MissingColumnsError as e:
+            messagebox.showerror(
+                "Błąd",
+                f"Plik {os.path.basename(e.path)} nie zawiera wymaganych kolumn: {e.missing}"
             )
-
-            # wybieramy tylko potrzebne kolumny
-            try:
-                selected = df[list(COLUMN_MAPPING.keys())]
-                selected = selected.rename(columns=COLUMN_MAPPING)
-            except KeyError as e:
-                messagebox.showerror(
-                    "Błąd",
-                    f"Plik {os.path.basename(file)} nie zawiera wymaganych kolumn: {e}"
-                )
-                return
-
-            target_df = pd.concat([target_df, selected], ignore_index=True)
-
-        # zapis XLSX
-        target_df.to_excel(self.target_file, index=False)
-
-        # zapis CSV
-        csv_output = os.path.splitext(self.target_file)[0] + ".csv"
-        target_df.to_csv(csv_output, sep=";", index=False, encoding="cp1250")
+            return
+        except MergeError as e:
+            messagebox.showerror("Błąd", f"Nie udało się wczytać pliku {os.path.basename(e.path)}: {e.reason}")
+            return
 
         messagebox.showinfo(
             "OK",
@@ -1,18 +1,26 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import pandas as pd
 import os
-
-# ============================================================
-# CONFIGURATION
-# ============================================================
-
-# Column indexes for TXT / TXT4 files (0-based indexing)
-# Order: Kod, ProduktNazwa, Cena, VAT
-TXT_COLUMN_INDEXES = [0, 3, 2, 4]
-
-# Final column names used in output files
-TARGET_COLUMNS = ["Kod", "ProduktNazwa", "Cena", "VAT"]
+import queue
+
+# Column mapping (TARGET_COLUMNS, TXT_COLUMN_INDEXES) is shared with the
+# merge engine and configured in column_finder/config.py
+from column_finder import (
+    GUI_WORKERS,
+    HEADER_CACHE_PATH,
+    INGEST_CACHE_DIR,
+    OUTPUT_FORMAT_CHOICES,
+    OUTPUT_FORMATS,
+    RUN_LOG_PATH,
+    MergeError,
+    MergeOptions,
+    WatchWorker,
+)
+from column_finder.arrow_io import ARROW_KINDS, has_pyarrow
+from column_finder.header_cache import clear_header_cache
+from column_finder.ingest_cache import clear_ingest_cache
+from column_finder.preview import clear_preview_cache, preview_lines
+from column_finder.tk_progress import MergeProgressPanel, MergeStatsPanel
 
 
 # ============================================================
@@ -23,7 +31,7 @@ class UniversalMergerApp:
     def __init__(self, root):
         # Root window configuration
         self.root = root
-        self.root.title("CSV/TXT/TXT4 → XLSX / CSV Merger + Preview")
+        self.root.title("CSV/TXT/TXT4/XLSM → XLSX / CSV Merger + Preview")
 
         # Internal state
         self.files = []          # List of selected input files
@@ -33,7 +41,7 @@ class UniversalMergerApp:
         # FILE SELECTION CONTROLS
         # ====================================================
 
-        tk.Label(root, text="Select files (CSV, TXT, TXT4)").pack(pady=5)
+        tk.Label(root, text="Select files (CSV, TXT, TXT4, XLSM, Parquet, Feather)").pack(pady=5)
         tk.Button(root, text="Select files", command=self.load_files).pack()
 
         # ====================================================
@@ -80,14 +88,67 @@ class UniversalMergerApp:
         self.target_label = tk.Label(root, text="Target file: none")
         self.target_label.pack()
 
+        # Incremental mode keeps master data in <target>.sqlite and only
+        # rewrites XLSX / CSV when it changed
+        self.incremental = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            root,
+            text="Incremental merge (SQLite store next to the target)",
+            variable=self.incremental
+        ).pack()
+
+        # Outputs written next to the target; with none selected the merge
+        # is a dry run (nothing is written, no target needed)
+        outputs_frame = tk.Frame(root)
+        outputs_frame.pack()
+        tk.Label(outputs_frame, text="Outputs:").pack(side=tk.LEFT)
+        self.output_vars = {}
+        for fmt in OUTPUT_FORMAT_CHOICES:
+            self.output_vars[fmt] = tk.BooleanVar(value=fmt in OUTPUT_FORMATS)
+            available = fmt not in ARROW_KINDS or has_pyarrow()
+            tk.Checkbutton(
+                outputs_frame,
+                text=fmt.upper(),
+                variable=self.output_vars[fmt],
+                state=tk.NORMAL if available else tk.DISABLED
+            ).pack(side=tk.LEFT)
+
+        # Unchanged inputs are loaded from the ingest cache on re-runs
         tk.Button(
+            root,
+            text="Clear cache",
+            command=self.clear_cache
+        ).pack(pady=5)
+
+        self.merge_button = tk.Button(
             root,
             text="Merge data + Sort",
             command=self.merge
-        ).pack(pady=10)
+        )
+        self.merge_button.pack(pady=10)
+
+        # Drop-folder watch: new files are merged incrementally as they land
+        self.watcher = None
+        self.watch_button = tk.Button(
+            root,
+            text="Watch folder...",
+            command=self.toggle_watch
+        )
+        self.watch_button.pack()
+
+        self.watch_label = tk.Label(root, text="")
+        self.watch_label.pack()
+
+        # Background merge progress (rows/s, ETA) with cancel button
+        self.progress = MergeProgressPanel(root)
+        self.progress.pack(fill=tk.X, padx=10, pady=5)
+
+        # Timings of the last merge (also logged to RUN_LOG_PATH)
+        self.stats = MergeStatsPanel(root)
+        self.stats.pack(fill=tk.X, padx=10, pady=5)
 
         # Initial window size
-        root.geometry("800x600")
+        root.geometry("800x830")
 
         # Bind preview refresh to listbox selection
         self.listbox.bind("<<ListboxSelect>>", self.show_preview)
@@ -99,7 +160,11 @@ class UniversalMergerApp:
     def load_files(self):
         """Open file dialog and add selected files to the list."""
         files = filedialog.askopenfilenames(
-            filetypes=[("CSV/TXT/TXT4 files", "*.csv *.txt *.txt4")]
+            filetypes=[
+                ("CSV/TXT/TXT4 files", "*.csv *.txt *.txt4"),
+                ("Excel files", "*.xlsm *.xlsx"),
+                ("Parquet/Feather files", "*.parquet *.feather *.arrow"),
+            ]
         )
 
         for file in files:
@@ -145,161 +210,192 @@ class UniversalMergerApp:
             return
 
         file = self.files[0]  # Preview always uses the first file
-        preview_lines = []
 
         try:
-            # ---------------- CSV PREVIEW ----------------
-            if file.lower().endswith(".csv"):
-                df = pd.read_csv(
-                    file,
-                    sep=";",
-                    encoding="cp1250",
-                    dtype=str,
-                    keep_default_na=False
-                )
+            # Bounded read (header + 5 rows), cached per path and mtime
+            lines = preview_lines(
+                file,
+                MergeOptions(header_cache=HEADER_CACHE_PATH),
+                nrows=5,
+                rename=False
+            )
+            self.preview_text.insert(tk.END, "\n".join(lines))
 
-                # Map existing CSV columns to target columns
-                mapped_cols = {}
-                for col in TARGET_COLUMNS:
-                    match = [c for c in df.columns if col.lower() in c.lower()]
-                    if match:
-                        mapped_cols[match[0]] = col
-                    else:
-                        df[col] = ""
-                        mapped_cols[col] = col
+        except Exception as e:
+            self.preview_text.insert(
+                tk.END,
+                f"Failed to read file preview: {e}"
+            )
 
-                preview_df = df[list(mapped_cols.keys())].head(5)
-                preview_lines = preview_df.to_string(index=False).split("\n")
+    # ========================================================
+    # FOLDER WATCH
+    # ========================================================
 
-            # ---------------- TXT / TXT4 PREVIEW ----------------
-            else:
-                with open(file, "r", encoding="utf-8", errors="replace") as f:
-                    for i, line in enumerate(f):
-                        if i >= 5:
-                            break
+    def toggle_watch(self):
+        """Start watching a drop folder, or stop the running watch."""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watch_button.config(state=tk.DISABLED)
+            return
 
-                        parts = line.rstrip("\n").split(";")
+        if not self.target_file:
+            messagebox.showerror("Error", "Please select a target file first")
+            return
 
-                        # Ensure enough columns exist
-                        while len(parts) < max(TXT_COLUMN_INDEXES) + 1:
-                            parts.append("")
+        folder = filedialog.askdirectory()
+        if not folder:
+            return
 
-                        selected = [parts[j] for j in TXT_COLUMN_INDEXES]
-                        preview_lines.append("; ".join(selected))
+        self.watcher = WatchWorker(
+            folder,
+            self.target_file,
+            MergeOptions(
+                header_cache=HEADER_CACHE_PATH,
+                outputs=self.selected_outputs()
+            )
+        )
+        self.watcher.start()
+        self.watch_button.config(text="Stop watching")
+        self.watch_label.config(text=f"Watching {folder}")
+        self.root.after(200, self.poll_watch)
+
+    def poll_watch(self):
+        """Show watch results on the Tk thread."""
+        while True:
+            try:
+                kind, payload = self.watcher.messages.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == "merged":
+                files, result = payload
+                self.watch_label.config(
+                    text=f"Merged {len(files)} file(s): {result.changed} "
+                         f"row(s) changed, {result.rows} in total"
+                )
+            elif kind == "error":
+                self.watch_label.config(text=f"Error: {payload}")
+            elif kind == "stopped":
+                self.watcher = None
+                self.watch_button.config(text="Watch folder...", state=tk.NORMAL)
+                return
 
-            self.preview_text.insert(tk.END, "\n".join(preview_lines))
+        self.root.after(200, self.poll_watch)
 
-        except Exception as e:
-            self.preview_text.insert(
-                tk.END,
-                f"Failed to read file preview: {e}"
+    # ========================================================
+    # CACHE
+    # ========================================================
+
+    def clear_cache(self):
+        """Forget cached input rows, header mappings and previews."""
+        if self.progress.running:
+            return
+
+        # The watch keeps merging in the background and uses the same cache
+        if self.watcher is not None:
+            messagebox.showerror(
+                "Error",
+                "Stop watching the folder before clearing the cache"
             )
+            return
+
+        freed = clear_ingest_cache(INGEST_CACHE_DIR)
+        clear_header_cache(HEADER_CACHE_PATH)
+        clear_preview_cache()
+        messagebox.showinfo(
+            "Cache",
+            f"Cache cleared ({freed / 2**20:.1f} MB freed)"
+        )
 
     # ========================================================
     # MERGE & SAVE LOGIC
     # ========================================================
 
+    def selected_outputs(self):
+        """Checked output formats, in the order of the checkboxes."""
+        return tuple(fmt for fmt, var in self.output_vars.items() if var.get())
+
     def merge(self):
-        """Merge all selected files, sort data and save XLSX + CSV."""
-        if not self.files or not self.target_file:
+        """Merge all selected files, sort data and save the selected outputs."""
+        outputs = self.selected_outputs()
+        if not self.files or (outputs and not self.target_file):
             messagebox.showerror(
                 "Error",
                 "Please select input files and a target file"
             )
             return
 
-        # Load existing target file if it exists
-        if os.path.exists(self.target_file):
-            target_df = pd.read_excel(self.target_file)
-        else:
-            target_df = pd.DataFrame(columns=TARGET_COLUMNS)
-
-        # Process each selected file
-        for file in self.files:
-            df_list = []
-
-            try:
-                # ---------------- CSV ----------------
-                if file.lower().endswith(".csv"):
-                    df = pd.read_csv(
-                        file,
-                        sep=";",
-                        encoding="cp1250",
-                        dtype=str,
-                        keep_default_na=False
-                    )
-
-                    mapped_cols = {}
-                    for col in TARGET_COLUMNS:
-                        match = [c for c in df.columns if col.lower() in c.lower()]
-                        if match:
-                            mapped_cols[match[0]] = col
-                        else:
-                            df[col] = ""
-                            mapped_cols[col] = col
-
-                    selected_df = (
-                        df[list(mapped_cols.keys())]
-                        .rename(columns=mapped_cols)
-                    )
-
-                # ---------------- TXT / TXT4 ----------------
-                else:
-                    with open(file, "r", encoding="utf-8", errors="replace") as f:
-                        for line in f:
-                            parts = line.rstrip("\n").split(";")
-
-                            while len(parts) < max(TXT_COLUMN_INDEXES) + 1:
-                                parts.append("")
-
-                            selected = [parts[i] for i in TXT_COLUMN_INDEXES]
-                            df_list.append(selected)
-
-                    selected_df = pd.DataFrame(
-                        df_list,
-                        columns=TARGET_COLUMNS
-                    )
-
-                target_df = pd.concat(
-                    [target_df, selected_df],
-                    ignore_index=True
-                )
-
-            except Exception as e:
-                messagebox.showerror(
-                    "Error",
-                    f"Failed to read file {os.path.basename(file)}: {e}"
-                )
-                return
-
-        # Sort by newest entries and keep unique product codes
-        target_df = target_df.iloc[::-1].reset_index(drop=True)
-        target_df = target_df.drop_duplicates(
-            subset="Kod",
-            keep="first"
-        )
+        if self.progress.running:
+            return
 
-        # Save XLSX
-        target_df.to_excel(self.target_file, index=False)
+        if self.watcher is not None:
+            messagebox.showerror(
+                "Error",
+                "Stop watching the folder before merging manually"
+            )
+            return
 
-        # Save CSV
-        csv_output = os.path.splitext(self.target_file)[0] + ".csv"
-        target_df.to_csv(
-            csv_output,
-            sep=";",
-            index=False,
-            encoding="utf-8"
+        # The merge runs in a worker thread so the window stays responsive
+        self.merge_button.config(state=tk.DISABLED)
+        self.progress.start(
+            self.files,
+            self.target_file,
+            MergeOptions(
+                workers=GUI_WORKERS,
+                header_cache=HEADER_CACHE_PATH,
+                ingest_cache=INGEST_CACHE_DIR,
+                outputs=outputs,
+                # A dry run must not touch the store either
+                incremental=self.incremental.get() and bool(outputs),
+                run_log=RUN_LOG_PATH
+            ),
+            on_done=self.merge_done,
+            on_error=self.merge_failed,
+            on_cancelled=self.merge_cancelled
         )
 
-        messagebox.showinfo(
-            "Success",
-            "Data has been saved to XLSX and CSV"
-        )
+    def merge_done(self, result):
+        """Called on the Tk thread once outputs are written."""
+        self.merge_button.config(state=tk.NORMAL)
+        self.stats.show(result)
+        if result.outputs:
+            lines = [
+                f"{t.format.upper()}: {os.path.basename(t.path)} ({t.seconds:.1f} s)"
+                for t in result.output_timings
+            ]
+            messagebox.showinfo(
+                "Success",
+                "Data has been saved:\n" + "\n".join(lines)
+            )
+        elif result.changed is not None:
+            messagebox.showinfo(
+                "Success",
+                "No changes - outputs are already up to date"
+            )
+        else:
+            messagebox.showinfo(
+                "Dry run",
+                f"Merged {result.rows} rows, no files were written"
+            )
 
         # Reset state
         self.files.clear()
         self.update_listbox()
 
+    def merge_failed(self, error):
+        """Called on the Tk thread when the merge raised an exception."""
+        self.merge_button.config(state=tk.NORMAL)
+        if isinstance(error, MergeError):
+            message = f"Failed to read file {os.path.basename(error.path)}: {error.reason}"
+        else:
+            message = f"Merge failed: {error}"
+        messagebox.showerror("Error", message)
+
+    def merge_cancelled(self):
+        """Called on the Tk thread when the user cancelled the merge."""
+        self.merge_button.config(state=tk.NORMAL)
+        messagebox.showinfo("Cancelled", "Merge cancelled, no files were written")
+
 
 # ============================================================
 # APPLICATION ENTRY POINT
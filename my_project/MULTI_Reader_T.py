@@ -1,24 +1,34 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import pandas as pd
 import os
 
-# ============================
-# Configuration
-# ============================
-
-# Column indexes for TXT / TXT4 files (0-based)
-# Order: Kod, ProduktNazwa, Cena, VAT
-TXT_COLUMN_INDEXES = [0, 3, 2, 4]
-
-# Final output columns
-TARGET_COLUMNS = ["Kod", "ProduktNazwa", "Cena", "VAT"]
+# Column mapping (TARGET_COLUMNS, TXT_COLUMN_INDEXES) is shared with the
+# merge engine and configured in column_finder/config.py
+from column_finder import (
+    GUI_WORKERS,
+    HEADER_CACHE_PATH,
+    INGEST_CACHE_DIR,
+    OUTPUT_FORMAT_CHOICES,
+    OUTPUT_FORMATS,
+    RUN_LOG_PATH,
+    MergeError,
+    MergeOptions,
+)
+from column_finder.arrow_io import ARROW_KINDS, has_pyarrow
+from column_finder.header_cache import clear_header_cache
+from column_finder.ingest_cache import clear_ingest_cache
+from column_finder.preview import clear_preview_cache, preview_lines
+from column_finder.tk_progress import (
+    POLISH_TEXTS,
+    MergeProgressPanel,
+    MergeStatsPanel,
+)
 
 
 class UniversalMergerApp:
     def __init__(self, root):
         self.root = root
-        self.root.title("CSV / TXT / TXT4 → XLSX / CSV Merger")
+        self.root.title("CSV / TXT / TXT4 / XLSM → XLSX / CSV Merger")
 
         self.files = []
         self.target_file = None
@@ -26,7 +36,7 @@ class UniversalMergerApp:
         # ============================
         # File selection
         # ============================
-        tk.Label(root, text="Wybierz pliki (CSV, TXT, TXT4)").pack(pady=5)
+        tk.Label(root, text="Wybierz pliki (CSV, TXT, TXT4, XLSM, Parquet, Feather)").pack(pady=5)
         tk.Button(root, text="Wybierz pliki", command=self.load_files).pack()
 
         # ============================
@@ -66,12 +76,34 @@ class UniversalMergerApp:
             variable=self.test_mode
         ).pack(anchor="w", padx=10)
 
+        # Formaty zapisywane obok pliku docelowego (tryb testowy pomija wszystkie)
+        outputs_frame = tk.Frame(root)
+        outputs_frame.pack(anchor="w", padx=10)
+        tk.Label(outputs_frame, text="Zapisz jako:").pack(side=tk.LEFT)
+        self.output_vars = {}
+        for fmt in OUTPUT_FORMAT_CHOICES:
+            self.output_vars[fmt] = tk.BooleanVar(value=fmt in OUTPUT_FORMATS)
+            available = fmt not in ARROW_KINDS or has_pyarrow()
+            tk.Checkbutton(
+                outputs_frame,
+                text=fmt.upper(),
+                variable=self.output_vars[fmt],
+                state=tk.NORMAL if available else tk.DISABLED
+            ).pack(side=tk.LEFT)
+
         tk.Checkbutton(
             root,
             text="Wyczyść listę plików po zakończeniu",
             variable=self.clear_after_merge
         ).pack(anchor="w", padx=10)
 
+        # Niezmienione pliki są przy kolejnym scalaniu czytane z cache
+        tk.Button(
+            root,
+            text="Wyczyść cache",
+            command=self.clear_cache
+        ).pack(anchor="w", padx=10, pady=5)
+
         # ============================
         # Target file selection
         # ============================
@@ -87,14 +119,25 @@ class UniversalMergerApp:
         # ============================
         # Action button
         # ============================
-        tk.Button(
+        self.merge_button = tk.Button(
             root,
             text="Kopiuj dane + Sortowanie",
             command=self.merge
-        ).pack(pady=10)
+        )
+        self.merge_button.pack(pady=10)
+
+        # ============================
+        # Progress (background merge)
+        # ============================
+        self.progress = MergeProgressPanel(root, texts=POLISH_TEXTS)
+        self.progress.pack(fill=tk.X, padx=10, pady=5)
+
+        # Czasy etapów ostatniego scalania (zapisywane też w RUN_LOG_PATH)
+        self.stats = MergeStatsPanel(root, title="Statystyki")
+        self.stats.pack(fill=tk.X, padx=10, pady=5)
 
         # Window size
-        root.geometry("800x600")
+        root.geometry("800x750")
 
         # Preview refresh on listbox selection
         self.listbox.bind("<<ListboxSelect>>", self.show_preview)
@@ -104,7 +147,11 @@ class UniversalMergerApp:
     # ============================
     def load_files(self):
         files = filedialog.askopenfilenames(
-            filetypes=[("CSV / TXT / TXT4", "*.csv *.txt *.txt4")]
+            filetypes=[
+                ("CSV / TXT / TXT4", "*.csv *.txt *.txt4"),
+                ("Excel", "*.xlsm *.xlsx"),
+                ("Parquet / Feather", "*.parquet *.feather *.arrow"),
+            ]
         )
         for file in files:
             if file not in self.files:
@@ -138,46 +185,32 @@ class UniversalMergerApp:
             return
 
         file = self.files[0]
-        preview_lines = []
 
         try:
-            if file.lower().endswith(".csv"):
-                df = pd.read_csv(
-                    file,
-                    sep=";",
-                    encoding="cp1250",
-                    dtype=str,
-                    keep_default_na=False
-                )
-
-                mapped_cols = {}
-                for col in TARGET_COLUMNS:
-                    match = [c for c in df.columns if col.lower() in c.lower()]
-                    if match:
-                        mapped_cols[match[0]] = col
-                    else:
-                        df[col] = ""
-                        mapped_cols[col] = col
-
-                preview_df = df[list(mapped_cols.keys())].rename(columns=mapped_cols)
-                preview_lines = preview_df.head(5).to_string(index=False).split("\n")
-
-            else:
-                with open(file, "r", encoding="utf-8", errors="replace") as f:
-                    for i, line in enumerate(f):
-                        if i >= 5:
-                            break
-                        parts = line.rstrip("\n").split(";")
-                        while len(parts) <= max(TXT_COLUMN_INDEXES):
-                            parts.append("")
-                        selected = [parts[i] for i in TXT_COLUMN_INDEXES]
-                        preview_lines.append("; ".join(selected))
-
-            self.preview_text.insert(tk.END, "\n".join(preview_lines))
+            # Only the first rows are read; unchanged files come from cache
+            lines = preview_lines(
+                file, MergeOptions(header_cache=HEADER_CACHE_PATH), nrows=5
+            )
+            self.preview_text.insert(tk.END, "\n".join(lines))
 
         except Exception as e:
             self.preview_text.insert(tk.END, f"Preview error: {e}")
 
+    # ============================
+    # Cache
+    # ============================
+    def clear_cache(self):
+        if self.progress.running:
+            return
+
+        freed = clear_ingest_cache(INGEST_CACHE_DIR)
+        clear_header_cache(HEADER_CACHE_PATH)
+        clear_preview_cache()
+        messagebox.showinfo(
+            "Cache",
+            f"Cache wyczyszczony (zwolniono {freed / 2**20:.1f} MB)"
+        )
+
     # ============================
     # Merge logic
     # ============================
@@ -186,69 +219,51 @@ class UniversalMergerApp:
             messagebox.showerror("Błąd", "Nie wybrano plików")
             return
 
-        if not self.test_mode.get() and not self.target_file:
+        outputs = () if self.test_mode.get() else tuple(
+            fmt for fmt, var in self.output_vars.items() if var.get()
+        )
+        if outputs and not self.target_file:
             messagebox.showerror("Błąd", "Nie wybrano pliku docelowego")
             return
 
-        target_df = pd.DataFrame(columns=TARGET_COLUMNS)
-
-        for file in self.files:
-            try:
-                if file.lower().endswith(".csv"):
-                    df = pd.read_csv(
-                        file,
-                        sep=";",
-                        encoding="cp1250",
-                        dtype=str,
-                        keep_default_na=False
-                    )
-
-                    mapped_cols = {}
-                    for col in TARGET_COLUMNS:
-                        match = [c for c in df.columns if col.lower() in c.lower()]
-                        if match:
-                            mapped_cols[match[0]] = col
-                        else:
-                            df[col] = ""
-                            mapped_cols[col] = col
-
-                    selected_df = df[list(mapped_cols.keys())].rename(columns=mapped_cols)
-
-                else:
-                    rows = []
-                    with open(file, "r", encoding="utf-8", errors="replace") as f:
-                        for line in f:
-                            parts = line.rstrip("\n").split(";")
-                            while len(parts) <= max(TXT_COLUMN_INDEXES):
-                                parts.append("")
-                            rows.append([parts[i] for i in TXT_COLUMN_INDEXES])
-
-                    selected_df = pd.DataFrame(rows, columns=TARGET_COLUMNS)
-
-                target_df = pd.concat([target_df, selected_df], ignore_index=True)
-
-            except Exception as e:
-                messagebox.showerror("Błąd", f"{os.path.basename(file)}: {e}")
-                return
-
-        # Sort newest first and keep unique Kod
-        target_df = target_df.iloc[::-1].reset_index(drop=True)
-        target_df = target_df.drop_duplicates(subset="Kod", keep="first")
+        # Existing target content is replaced, no outputs means a test run
+        options = MergeOptions(
+            include_target=False,
+            workers=GUI_WORKERS,
+            header_cache=HEADER_CACHE_PATH,
+            ingest_cache=INGEST_CACHE_DIR,
+            outputs=outputs,
+            run_log=RUN_LOG_PATH
+        )
 
-        # ============================
-        # Save (unless test mode)
-        # ============================
-        if not self.test_mode.get():
-            target_df.to_excel(self.target_file, index=False)
+        if self.progress.running:
+            return
+
+        self.merge_button.config(state=tk.DISABLED)
+        self.progress.start(
+            self.files,
+            self.target_file,
+            options,
+            on_done=self.merge_done,
+            on_error=self.merge_failed,
+            on_cancelled=self.merge_cancelled
+        )
 
-            csv_output = os.path.splitext(self.target_file)[0] + ".csv"
-            target_df.to_csv(csv_output, sep=";", index=False, encoding="utf-8")
+    def merge_done(self, result):
+        self.merge_button.config(state=tk.NORMAL)
+        self.stats.show(result)
 
-            messagebox.showinfo("OK", "Dane zapisane do XLSX i CSV")
+        if result.outputs:
+            lines = [
+                f"{t.format.upper()}: {os.path.basename(t.path)} ({t.seconds:.1f} s)"
+                for t in result.output_timings
+            ]
+            messagebox.showinfo("OK", "Dane zapisane:\n" + "\n".join(lines))
         else:
             messagebox.showinfo(
                 "Tryb testowy",
-                f"Przetworzono {len(target_df)} wierszy\nZapis pominięty"
+                f"Przetworzono {result.rows} wierszy w {result.seconds:.1f} s\n"
+                f"Zapis pominięty (szczegóły w panelu statystyk)"
             )
 
         # Clear file list if enabled
@@ -256,6 +271,17 @@ class UniversalMergerApp:
             self.files.clear()
             self.update_listbox()
 
+    def merge_failed(self, error):
+        self.merge_button.config(state=tk.NORMAL)
+        if isinstance(error, MergeError):
+            messagebox.showerror("Błąd", f"{os.path.basename(error.path)}: {error.reason}")
+        else:
+            messagebox.showerror("Błąd", f"Scalanie nie powiodło się: {error}")
+
+    def merge_cancelled(self):
+        self.merge_button.config(state=tk.NORMAL)
+        messagebox.showinfo("Anulowano", "Scalanie anulowane, pliki nie zostały zapisane")
+
 
 # ============================
 # App start
@@ -1,11 +1,12 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import pandas as pd
 import os
 
+from column_finder import MergeError, MergeOptions, merge_files
+
 # TXT mapping (0-based)
 COLUMN_INDEXES = [0, 3, 2, 4]  # Kod, ProduktNazwa, Cena, VAT
-TARGET_COLUMNS = ["Kod", "ProduktNazwa", "Cena", "VAT"]
+OPTIONS = MergeOptions(txt_column_indexes=COLUMN_INDEXES, dedupe=False)
 
 class TXTtoXLSXApp:
     def __init__(self, root):
@@ -60,38 +61,11 @@ class TXTtoXLSXApp:
             messagebox.showerror("Błąd", "Wybierz pliki TXT i plik docelowy")
             return
 
-        # wczytaj lub utwórz dane wynikowe
-        if os.path.exists(self.target_file):
-            target_df = pd.read_excel(self.target_file)
-        else:
-            target_df = pd.DataFrame(columns=TARGET_COLUMNS)
-
-        for file in self.txt_files:
-            df_list = []
-            try:
-                with open(file, "r", encoding="utf-8", errors="replace") as f:
-                    for line in f:
-                        line = line.rstrip("\n")
-                        parts = line.split(";")
-                        # uzupełniamy brakujące kolumny pustym stringiem
-                        while len(parts) < max(COLUMN_INDEXES) + 1:
-                            parts.append("")
-                        # wybieramy tylko potrzebne kolumny
-                        selected = [parts[i] for i in COLUMN_INDEXES]
-                        df_list.append(selected)
-                df = pd.DataFrame(df_list, columns=TARGET_COLUMNS)
-            except Exception as e:
-                messagebox.showerror("Błąd", f"Nie udało się wczytać pliku {os.path.basename(file)}: {e}")
-                return
-
-            target_df = pd.concat([target_df, df], ignore_index=True)
-
-        # zapis XLSX
-        target_df.to_excel(self.target_file, index=False)
-
-        # zapis CSV
-        csv_output = os.path.splitext(self.target_file)[0] + ".csv"
-        target_df.to_csv(csv_output, sep=";", index=False, encoding="utf-8")
+        try:
+            merge_files(self.txt_files, self.target_file, OPTIONS)
+        except MergeError as e:
+            messagebox.showerror("Błąd", f"Nie udało się wczytać pliku {os.path.basename(e.path)}: {e.reason}")
+            return
 
         messagebox.showinfo("OK", "Dane zostały zapisane do XLSX i CSV")
 
@@ -1,9 +1,17 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import pandas as pd
 import os
 #import openpyxl
 
+from column_finder import (
+    GUI_WORKERS,
+    XLSM_COLUMNS,
+    MergeError,
+    MergeOptions,
+    MissingColumnsError,
+)
+from column_finder.tk_progress import POLISH_TEXTS, MergeProgressPanel
+
 class XLSXMergerApp:
     def __init__(self, root):
         self.root = root
@@ -11,7 +19,7 @@ class XLSXMergerApp:
         self.file_list = []
 
         # Stałe kolumny
-        self.columns_to_copy = ["Kod", "ProduktNazwa", "VAT", "CenaBrutto"]
+        self.columns_to_copy = list(XLSM_COLUMNS)
 
         self.label = tk.Label(root, text="Wybierz pliki XLSM do skopiowania")
         self.label.pack(pady=10)
@@ -31,6 +39,10 @@ class XLSXMergerApp:
         self.merge_button = tk.Button(root, text="Kopiuj dane", command=self.merge_columns)
         self.merge_button.pack(pady=10)
 
+        # postęp scalania w tle + anulowanie
+        self.progress = MergeProgressPanel(root, texts=POLISH_TEXTS)
+        self.progress.pack(fill=tk.X, padx=10, pady=5)
+
         self.target_file = None
 
     def load_files(self):
@@ -50,47 +62,60 @@ class XLSXMergerApp:
         if self.target_file:
             self.target_label.config(text=f"Plik docelowy: {os.path.basename(self.target_file)}")
 
-    def validate_columns(self, df, file_path):
-        missing = [col for col in self.columns_to_copy if col not in df.columns]
-        if missing:
-            messagebox.showerror(
-                "Błąd kolumn",
-                f"Plik '{os.path.basename(file_path)}' nie zawiera wymaganych kolumn:\n{', '.join(missing)}"
-            )
-            return False
-        return True
-
     def merge_columns(self):
         if not self.file_list or not self.target_file:
             messagebox.showerror("Błąd", "Wybierz pliki źródłowe i docelowy")
             return
 
-        # wczytanie lub utworzenie pliku docelowego
-        if os.path.exists(self.target_file):
-            target_df = pd.read_excel(self.target_file, engine="openpyxl")
-        else:
-            target_df = pd.DataFrame(columns=self.columns_to_copy)
-
-        # startujemy od końca
-        start_row = len(target_df)
+        # skoroszyty czytane równolegle, tylko potrzebne kolumny; jeden
+        # (najnowszy) wiersz na Kod, również dla danych już w pliku docelowym
+        options = MergeOptions(
+            columns=self.columns_to_copy,
+            mapping="strict",
+            dedupe=True,
+            outputs=("xlsx",),
+            workers=GUI_WORKERS
+        )
 
-        for file in self.file_list:
-            df = pd.read_excel(file, engine="openpyxl")
-            if not self.validate_columns(df, file):
-                return
-            df_selected = df[self.columns_to_copy]
+        if self.progress.running:
+            return
 
-            target_df = pd.concat([target_df, df_selected], ignore_index=True)
+        self.merge_button.config(state=tk.DISABLED)
+        self.progress.start(
+            self.file_list,
+            self.target_file,
+            options,
+            on_done=self.merge_done,
+            on_error=self.merge_failed,
+            on_cancelled=self.merge_cancelled
+        )
 
-        target_df.to_excel(self.target_file, index=False, engine="openpyxl")
+    def merge_done(self, result):
+        self.merge_button.config(state=tk.NORMAL)
         messagebox.showinfo("Sukces", "Dane zostały skopiowane!")
 
         # odświeżenie listy plików
         self.file_list.clear()
         self.file_listbox.delete(0, tk.END)
 
+    def merge_failed(self, error):
+        self.merge_button.config(state=tk.NORMAL)
+        if isinstance(error, MissingColumnsError):
+            messagebox.showerror(
+                "Błąd kolumn",
+                f"Plik '{os.path.basename(error.path)}' nie zawiera wymaganych kolumn:\n{', '.join(error.missing)}"
+            )
+        elif isinstance(error, MergeError):
+            messagebox.showerror("Błąd", f"Nie udało się wczytać pliku {os.path.basename(error.path)}: {error.reason}")
+        else:
+            messagebox.showerror("Błąd", f"Kopiowanie nie powiodło się: {error}")
+
+    def merge_cancelled(self):
+        self.merge_button.config(state=tk.NORMAL)
+        messagebox.showinfo("Anulowano", "Kopiowanie anulowane, plik docelowy bez zmian")
+
 if __name__ == "__main__":
     root = tk.Tk()
     app = XLSXMergerApp(root)
-    root.geometry("500x350")
+    root.geometry("500x400")
     root.mainloop()
@@ -0,0 +1,75 @@
+"""Headless merge engine shared by the Tkinter apps and the CLI.
+
+Typical use::
+
+    from column_finder import MergeOptions, merge_files
+
+    merge_files(["a.csv", "b.txt"], "target.xlsx", MergeOptions())
+
+Run ``python -m column_finder --help`` for the command line interface.
+"""
+
+from .config import (
+    GUI_WORKERS,
+    HEADER_CACHE_PATH,
+    INGEST_CACHE_DIR,
+    OUTPUT_FORMAT_CHOICES,
+    OUTPUT_FORMATS,
+    RUN_LOG_PATH,
+    TARGET_COLUMNS,
+    TXT_COLUMN_INDEXES,
+    XLSM_COLUMNS,
+)
+from .engine import (
+    FileTiming,
+    MergeResult,
+    OutputTiming,
+    Progress,
+    dedupe_newest,
+    export_catalogue,
+    merge_files,
+    merge_frames,
+    worker_summary,
+)
+from .errors import MergeCancelled, MergeError, MissingColumnsError
+from .options import MergeOptions
+from .readers import input_kind, read_input, read_input_chunks
+from .stats import format_stats, run_stats
+from .store import CatalogueStore, store_path
+from .watch import watch_folder
+from .worker import MergeWorker, WatchWorker
+
+__all__ = [
+    "GUI_WORKERS",
+    "HEADER_CACHE_PATH",
+    "INGEST_CACHE_DIR",
+    "OUTPUT_FORMAT_CHOICES",
+    "OUTPUT_FORMATS",
+    "RUN_LOG_PATH",
+    "TARGET_COLUMNS",
+    "TXT_COLUMN_INDEXES",
+    "XLSM_COLUMNS",
+    "CatalogueStore",
+    "FileTiming",
+    "MergeCancelled",
+    "MergeError",
+    "MergeOptions",
+    "MergeResult",
+    "MergeWorker",
+    "MissingColumnsError",
+    "OutputTiming",
+    "Progress",
+    "WatchWorker",
+    "dedupe_newest",
+    "export_catalogue",
+    "format_stats",
+    "input_kind",
+    "merge_files",
+    "merge_frames",
+    "read_input",
+    "read_input_chunks",
+    "run_stats",
+    "store_path",
+    "watch_folder",
+    "worker_summary",
+]
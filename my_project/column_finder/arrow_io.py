@@ -0,0 +1,114 @@
+import pandas as pd
+
+
+# ============================================================
+# APACHE ARROW / PARQUET SUPPORT (optional pyarrow)
+# ============================================================
+
+ARROW_KINDS = {
+    "parquet": "Parquet",
+    "feather": "Arrow IPC / Feather",
+}
+
+
+def require_pyarrow(kind):
+    """Import pyarrow or fail with an installation hint for ``kind``."""
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError(
+            f"{ARROW_KINDS[kind]} files need the pyarrow package "
+            f"(pip install pyarrow)"
+        ) from None
+    return pyarrow
+
+
+def has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def arrow_columns(path, kind):
+    """Return the column names stored in a Parquet or Feather file."""
+    pa = require_pyarrow(kind)
+    if kind == "parquet":
+        import pyarrow.parquet as pq
+
+        return list(pq.read_schema(path).names)
+    with pa.memory_map(path) as source:
+        return list(pa.ipc.open_file(source).schema.names)
+
+
+def _to_pandas(batch):
+    df = batch.to_pandas()
+    # Dictionary-encoded columns come back as categoricals: merge them as
+    # plain values like every other input
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(df[col].cat.categories.dtype)
+    return df
+
+
+def iter_arrow_frames(path, kind, columns, batch_size=None):
+    """Yield frames with ``columns`` from a Parquet or Feather file.
+
+    Only ``columns`` are read. Parquet is streamed in ``batch_size`` rows;
+    Feather files are memory-mapped and yielded per record batch.
+    """
+    pa = require_pyarrow(kind)
+    if kind == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        if not batch_size:
+            yield _to_pandas(parquet.read(columns=columns))
+            return
+        for batch in parquet.iter_batches(batch_size=batch_size, columns=columns):
+            yield _to_pandas(batch)
+        return
+
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            yield _to_pandas(reader.get_batch(i).select(columns))
+
+
+def _arrow_ready(df, dictionary_columns):
+    """Copy of ``df`` that pyarrow can store, with dictionary columns."""
+    df = df.copy()
+    for col in df.columns:
+        # Categories mixing numbers and text are stored as plain text
+        if isinstance(df[col].dtype, pd.CategoricalDtype) and pd.api.types.infer_dtype(
+            df[col].cat.categories, skipna=True
+        ) != "string":
+            df[col] = df[col].astype(object)
+        # Rows from an existing XLSX may mix numbers and text in a column
+        if df[col].dtype == object and pd.api.types.infer_dtype(
+            df[col], skipna=True
+        ) not in ("string", "empty"):
+            df[col] = df[col].map(
+                lambda v: v if v is None or isinstance(v, str) or pd.isna(v) else str(v)
+            )
+    for col in dictionary_columns:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+
+def write_arrow(df, path, kind, dictionary_columns=()):
+    """Write ``df`` as Parquet or Feather (Arrow IPC) without the index."""
+    pa = require_pyarrow(kind)
+    table = pa.Table.from_pandas(
+        _arrow_ready(df, dictionary_columns), preserve_index=False
+    )
+    if kind == "parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, path)
+    else:
+        import pyarrow.feather as feather
+
+        feather.write_feather(table, path)
@@ -0,0 +1,519 @@
+"""Micro-benchmarks for the merge engine.
+
+Run from the ``my_project`` directory::
+
+    python -m column_finder.bench concat --files 10,100,1000 --rows 500
+    python -m column_finder.bench txt --rows 1000000
+    python -m column_finder.bench xlsx --rows 100000
+    python -m column_finder.bench dedupe --files 10 --rows 200000
+    python -m column_finder.bench compact --files 10 --rows 200000
+    python -m column_finder.bench pipeline --rows 100000 --output bench.json
+
+The ``pipeline`` scenario generates CSV (cp1250, fuzzy headers), TXT /
+TXT4 and XLSM inputs and times every stage of a merge separately, with
+the peak RSS of the process after each stage.
+"""
+
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from .config import SEPARATOR, TARGET_COLUMNS
+from .encoding import resolve_encodings
+from .engine import FrameCollector, NewestRowCollector, dedupe_newest
+from .excel_reader import SheetReader, excel_engine
+from .options import MergeOptions
+from .readers import (
+    column_plan,
+    input_kind,
+    read_input_chunks,
+    read_txt,
+    read_txt_lines,
+    resolve_csv_columns,
+)
+from .stats import peak_rss
+from .writers import XLSX_WRITERS, write_csv, write_xlsx, xlsx_writer_name
+
+
+# ============================================================
+# SYNTHETIC DATA
+# ============================================================
+
+def synthetic_frame(rows, offset=0, columns=TARGET_COLUMNS):
+    """Return a string frame shaped like one parsed supplier file."""
+    codes = [f"K{(offset + i) % 50000:06d}" for i in range(rows)]
+    return pd.DataFrame({
+        columns[0]: codes,
+        columns[1]: [f"Produkt {c}" for c in codes],
+        columns[2]: [f"{i % 997},{i % 100:02d}" for i in range(rows)],
+        columns[3]: ["23"] * rows,
+    }, dtype=str)
+
+
+def write_synthetic_txt(path, rows, encoding="utf-8"):
+    """Write a headerless TXT4-like file (Kod;x;Cena;Nazwa;VAT[;extra])."""
+    with open(path, "w", encoding=encoding, newline="\n") as f:
+        for i in range(rows):
+            fields = [f"K{i % 50000:06d}", "szt", f"{i % 997},{i % 100:02d}",
+                      f"Produkt żółty {i % 5000}", "23"]
+            if i % 7 == 0:
+                fields = fields[:2]  # short line, padded with ""
+            elif i % 5 == 0:
+                fields.append("extra")
+            f.write(";".join(fields) + "\n")
+
+
+# Supplier-style CSV headers: extra columns, other order and names that
+# only match the target columns by substring
+CSV_HEADERS = [
+    ["Kod", "ProduktNazwa", "Cena", "VAT"],
+    ["Lp", "Kod towaru", "ProduktNazwa (pełna)", "Jm", "Cena netto zł", "Stawka VAT"],
+    ["Stawka VAT", "Cena brutto", "Magazyn", "ProduktNazwa", "Kod produktu"],
+]
+
+
+def _product(i):
+    return {
+        "Kod": f"K{i % 50000:06d}",
+        "ProduktNazwa": f"Produkt żółty łąka {i % 5000}",
+        "Cena": f"{i % 997},{i % 100:02d}",
+        "VAT": ("23", "8", "5")[i % 3],
+    }
+
+
+def write_synthetic_csv(path, rows, offset=0, variant=0, encoding="cp1250"):
+    """Write a supplier CSV (``;``-separated) with a fuzzy header variant."""
+    header = CSV_HEADERS[variant % len(CSV_HEADERS)]
+    targets = [
+        next((t for t in TARGET_COLUMNS if t.lower() in name.lower()), None)
+        for name in header
+    ]
+    with open(path, "w", encoding=encoding, newline="") as f:
+        f.write(SEPARATOR.join(header) + "\r\n")
+        for i in range(offset, offset + rows):
+            product = _product(i)
+            fields = [product[t] if t else "x" for t in targets]
+            f.write(SEPARATOR.join(fields) + "\r\n")
+
+
+def write_synthetic_xlsm(path, rows, offset=0):
+    """Write an XLSM-style price list (CenaBrutto, extra columns)."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Cennik")
+    ws.append(["Kod", "ProduktNazwa", "VAT", "CenaBrutto", "Magazyn", "Uwagi"])
+    for i in range(offset, offset + rows):
+        product = _product(i)
+        ws.append([
+            product["Kod"], product["ProduktNazwa"], int(product["VAT"]),
+            round(i % 997 + (i % 100) / 100, 2), i % 40, None
+        ])
+    wb.save(path)
+
+
+def generate_inputs(folder, csv_files, txt_files, xlsm_files, rows, xlsm_rows):
+    """Write synthetic inputs into ``folder`` and return their paths.
+
+    CSV and TXT / TXT4 files get ``rows`` rows each, XLSM files
+    ``xlsm_rows``; codes overlap between files so deduplication has work.
+    """
+    paths = []
+    for i in range(csv_files):
+        path = os.path.join(folder, f"dostawca_{i:03d}.csv")
+        write_synthetic_csv(path, rows, offset=i * rows // 2, variant=i)
+        paths.append(path)
+    for i in range(txt_files):
+        path = os.path.join(folder, f"eksport_{i:03d}.{('txt', 'txt4')[i % 2]}")
+        write_synthetic_txt(path, rows)
+        paths.append(path)
+    for i in range(xlsm_files):
+        path = os.path.join(folder, f"cennik_{i:03d}.xlsm")
+        write_synthetic_xlsm(path, xlsm_rows, offset=i * xlsm_rows)
+        paths.append(path)
+    return paths
+
+
+# ============================================================
+# MEASUREMENT
+# ============================================================
+
+def environment():
+    """Versions and machine facts stored next to JSON results."""
+    import openpyxl
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "openpyxl": openpyxl.__version__,
+        "excel_reader": excel_engine(),
+        "xlsx_writer": xlsx_writer_name(),
+    }
+
+
+# ============================================================
+# SCENARIOS
+# ============================================================
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def bench_concat(file_counts, rows_per_file):
+    """Compare the legacy per-file ``pd.concat`` loop with FrameCollector."""
+    results = []
+    for count in file_counts:
+        frames = [synthetic_frame(rows_per_file, i * rows_per_file)
+                  for i in range(count)]
+
+        def legacy():
+            target_df = pd.DataFrame(columns=TARGET_COLUMNS)
+            for df in frames:
+                target_df = pd.concat([target_df, df], ignore_index=True)
+
+        def collector():
+            collect = FrameCollector(TARGET_COLUMNS)
+            for df in frames:
+                collect.add(df)
+            collect.frame()
+
+        for name, func in (("legacy_concat", legacy), ("collector", collector)):
+            seconds = _timed(func)
+            results.append({
+                "scenario": "concat",
+                "method": name,
+                "files": count,
+                "rows": count * rows_per_file,
+                "seconds": round(seconds, 6),
+                "us_per_file": round(seconds / count * 1e6, 1),
+            })
+    return results
+
+
+def bench_txt(rows):
+    """Compare the per-line Python TXT loop with the C-parser and mmap readers."""
+    workers = os.cpu_count() or 1
+    readers = (
+        ("line_loop", read_txt_lines, MergeOptions()),
+        ("vectorized", read_txt, MergeOptions()),
+        ("mmap", read_txt, MergeOptions(txt_reader="mmap")),
+        (f"mmap_x{workers}", read_txt,
+         MergeOptions(txt_reader="mmap", txt_range_workers=workers)),
+    )
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.txt4")
+        write_synthetic_txt(path, rows)
+        for name, reader, options in readers:
+            seconds = _timed(lambda: reader(path, options))
+            results.append({
+                "scenario": "txt",
+                "method": name,
+                "files": 1,
+                "rows": rows,
+                "seconds": round(seconds, 6),
+                "rows_per_second": round(rows / seconds),
+            })
+    return results
+
+
+def _peak_memory(func):
+    """Peak Python heap allocated while ``func`` runs (tracemalloc)."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_xlsx(rows):
+    """Compare rows/s and peak memory of the XLSX writer backends."""
+    df = synthetic_frame(rows)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, writer in XLSX_WRITERS.items():
+            path = os.path.join(tmp, f"{name}.xlsx")
+            try:
+                seconds = _timed(lambda: writer(df, path, None))
+            except ImportError:
+                continue  # optional backend not installed
+            peak = _peak_memory(lambda: writer(df, path, None))
+            results.append({
+                "scenario": "xlsx",
+                "method": name,
+                "files": 1,
+                "rows": rows,
+                "seconds": round(seconds, 6),
+                "rows_per_second": round(rows / seconds),
+                "peak_mb": round(peak / 2**20, 1),
+            })
+    return results
+
+
+def bench_dedupe(file_counts, rows_per_file):
+    """Compare collect-then-dedupe with the streaming NewestRowCollector."""
+    results = []
+    for count in file_counts:
+        def frames():
+            # Generated lazily so only the collectors hold rows
+            return (synthetic_frame(rows_per_file, i * rows_per_file)
+                    for i in range(count))
+
+        def legacy():
+            collect = FrameCollector(TARGET_COLUMNS)
+            for df in frames():
+                collect.add(df)
+            dedupe_newest(collect.frame())
+
+        def streaming():
+            collect = NewestRowCollector(TARGET_COLUMNS)
+            for df in frames():
+                collect.add(df)
+            collect.frame()
+
+        for name, func in (("reverse_dedupe", legacy), ("streaming", streaming)):
+            seconds = _timed(func)
+            peak = _peak_memory(func)
+            results.append({
+                "scenario": "dedupe",
+                "method": name,
+                "files": count,
+                "rows": count * rows_per_file,
+                "seconds": round(seconds, 6),
+                "rows_per_second": round(count * rows_per_file / seconds),
+                "peak_mb": round(peak / 2**20, 1),
+            })
+    return results
+
+
+def bench_compact(file_counts, rows_per_file):
+    """Compare plain string frames with the compact dtypes (compact.py)."""
+    results = []
+    for count in file_counts:
+        for dedupe in (False, True):
+            for compact in (False, True):
+                collector = NewestRowCollector if dedupe else FrameCollector
+                data = {}
+
+                def collect():
+                    collect = collector(TARGET_COLUMNS, compact=compact)
+                    for i in range(count):
+                        collect.add(synthetic_frame(rows_per_file, i * rows_per_file))
+                    data["frame"] = collect.frame()
+
+                seconds = _timed(collect)
+                frame_size = data.pop("frame").memory_usage(deep=True).sum()
+                results.append({
+                    "scenario": "compact",
+                    "method": ("dedupe" if dedupe else "concat")
+                              + ("_compact" if compact else "_plain"),
+                    "files": count,
+                    "rows": count * rows_per_file,
+                    "seconds": round(seconds, 6),
+                    "rows_per_second": round(count * rows_per_file / seconds),
+                    "frame_mb": round(frame_size / 2**20, 1),
+                })
+    return results
+
+
+def _map_headers(files, options):
+    """Resolve the column mapping of every headered input (header only)."""
+    for path in files:
+        kind = input_kind(path)
+        if kind == "csv":
+            resolve_csv_columns(path, resolve_encodings(path, options))
+        elif kind == "excel":
+            with SheetReader(path, options.excel_reader) as sheet:
+                column_plan(sheet.header, path, options)
+
+
+def bench_pipeline(csv_files, txt_files, xlsm_files, rows, xlsm_rows,
+                   data_dir=None):
+    """Time each stage of a merge of generated inputs.
+
+    Stages run one after another on the output of the previous one:
+    ``mapping`` (header resolution alone), ``parse`` (reading every file,
+    which includes its mapping), ``concat``, ``dedupe`` (reverse, keep the
+    first row per code), ``xlsx_write`` and ``csv_write``. Inputs are
+    written to ``data_dir`` (kept) or a temporary folder.
+    """
+    options = MergeOptions()
+    results = []
+
+    def stage(name, func, rows_in):
+        seconds = _timed(func)
+        peak = peak_rss()
+        results.append({
+            "scenario": "pipeline",
+            "method": name,
+            "files": len(files),
+            "rows": rows_in,
+            "seconds": round(seconds, 6),
+            "rows_per_second": round(rows_in / seconds) if rows_in and seconds else None,
+            "peak_rss_mb": None if peak is None else round(peak / 2**20, 1),
+        })
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = data_dir or tmp
+        os.makedirs(folder, exist_ok=True)
+        files = generate_inputs(
+            folder, csv_files, txt_files, xlsm_files, rows, xlsm_rows
+        )
+        input_rows = (csv_files + txt_files) * rows + xlsm_files * xlsm_rows
+        headered = [f for f in files if input_kind(f) in ("csv", "excel")]
+        data = {}
+
+        # Header-only work: no per-row throughput
+        stage("mapping", lambda: _map_headers(headered, options), 0)
+
+        def parse():
+            data["frames"] = [
+                chunk for path in files
+                for chunk in read_input_chunks(path, options)
+            ]
+        stage("parse", parse, input_rows)
+
+        def concat():
+            collector = FrameCollector(options.columns, options.compact)
+            for df in data.pop("frames"):
+                collector.add(df)
+            data["merged"] = collector.frame()
+        stage("concat", concat, input_rows)
+
+        def dedupe():
+            data["result"] = dedupe_newest(data.pop("merged"))
+        stage("dedupe", dedupe, input_rows)
+
+        result = data["result"]
+        stage("xlsx_write", lambda: write_xlsx(
+            result, os.path.join(tmp, "wynik.xlsx"), options
+        ), len(result))
+        stage("csv_write", lambda: write_csv(
+            result, os.path.join(tmp, "wynik.csv"), options
+        ), len(result))
+
+    results.append({
+        "scenario": "pipeline",
+        "method": "total",
+        "files": len(files),
+        "rows": input_rows,
+        "seconds": round(sum(r["seconds"] for r in results), 6),
+        "peak_rss_mb": results[-1]["peak_rss_mb"],
+    })
+    return results
+
+
+SCENARIOS = {
+    "concat": lambda args: bench_concat(args.files, args.rows or 500),
+    "txt": lambda args: bench_txt(args.rows or 1_000_000),
+    "xlsx": lambda args: bench_xlsx(args.rows or 100_000),
+    "dedupe": lambda args: bench_dedupe(args.files, args.rows or 100_000),
+    "compact": lambda args: bench_compact(args.files, args.rows or 100_000),
+    "pipeline": lambda args: bench_pipeline(
+        args.csv_files, args.txt_files, args.xlsm_files,
+        args.rows or 100_000, args.xlsm_rows, args.data_dir
+    ),
+}
+
+
+# ============================================================
+# ENTRY POINT
+# ============================================================
+
+def _counts(value):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m column_finder.bench")
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument(
+        "--files", type=_counts, default=[10, 100, 1000],
+        help="comma-separated file counts (default: 10,100,1000)"
+    )
+    parser.add_argument(
+        "--rows", type=int, default=None,
+        help="rows per synthetic file (default: 500 for concat, "
+             "1000000 for txt, 100000 for xlsx, dedupe, compact and pipeline)"
+    )
+    pipeline = parser.add_argument_group("pipeline scenario")
+    pipeline.add_argument(
+        "--csv-files", type=int, default=4,
+        help="generated CSV files (default: %(default)s)"
+    )
+    pipeline.add_argument(
+        "--txt-files", type=int, default=4,
+        help="generated TXT / TXT4 files (default: %(default)s)"
+    )
+    pipeline.add_argument(
+        "--xlsm-files", type=int, default=2,
+        help="generated XLSM files (default: %(default)s)"
+    )
+    pipeline.add_argument(
+        "--xlsm-rows", type=int, default=10_000,
+        help="rows per XLSM file (default: %(default)s)"
+    )
+    pipeline.add_argument(
+        "--data-dir", default=None,
+        help="write (and keep) the generated inputs in this folder"
+    )
+    parser.add_argument(
+        "--json", action="store_true",
+        help="print results as JSON instead of a table"
+    )
+    parser.add_argument(
+        "--output", metavar="PATH", default=None,
+        help="also save results with environment details as JSON, for "
+             "comparing runs across releases"
+    )
+    args = parser.parse_args(argv)
+
+    results = SCENARIOS[args.scenario](args)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "scenario": args.scenario,
+                "arguments": vars(args),
+                "environment": environment(),
+                "results": results,
+            }, f, indent=2, ensure_ascii=False)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for r in results:
+            line = (
+                f"{r['method']:>14}  files={r['files']:>5}  rows={r['rows']:>8}  "
+                f"{r['seconds']:>9.3f}s"
+            )
+            if "us_per_file" in r:
+                line += f"  {r['us_per_file']:>10.1f} us/file"
+            if r.get("rows_per_second") is not None:
+                line += f"  {r['rows_per_second']:>10,} rows/s"
+            if "peak_mb" in r:
+                line += f"  peak {r['peak_mb']:>8.1f} MB"
+            if "frame_mb" in r:
+                line += f"  frame {r['frame_mb']:>8.1f} MB"
+            if r.get("peak_rss_mb") is not None:
+                line += f"  peak RSS {r['peak_rss_mb']:>8.1f} MB"
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,499 @@
+import argparse
+import os
+import sys
+import time
+
+from .config import (
+    AUTO_ENCODING,
+    CHUNK_ROWS,
+    DELTA_FORMATS,
+    HEADER_CACHE_PATH,
+    INGEST_CACHE_DIR,
+    INGEST_CACHE_MB,
+    OUTPUT_FORMAT_CHOICES,
+    OUTPUT_FORMATS,
+    RUN_LOG_PATH,
+    TARGET_COLUMNS,
+    TXT_COLUMN_INDEXES,
+)
+from .engine import export_catalogue, merge_files, worker_summary
+from .errors import MergeError
+from .header_cache import clear_header_cache
+from .ingest_cache import clear_ingest_cache
+from .options import MergeOptions
+from .stats import PROFILERS, format_stats
+from .store import CatalogueStore, store_path
+from .watch import SETTLE_SECONDS, WATCH_INTERVAL, watch_folder
+
+
+# ============================================================
+# ARGUMENT PARSING
+# ============================================================
+
+def _names(value):
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def _indexes(value):
+    return [int(i) for i in _names(value)]
+
+
+def _formats(value):
+    if value.lower() == "none":
+        return ()
+    formats = tuple(_names(value))
+    unknown = [fmt for fmt in formats if fmt not in OUTPUT_FORMAT_CHOICES]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown output format(s): {unknown}")
+    return formats
+
+
+def _add_column_arguments(parser):
+    parser.add_argument(
+        "--columns",
+        type=_names,
+        default=list(TARGET_COLUMNS),
+        help="comma-separated output columns (default: %(default)s)"
+    )
+
+
+def _add_reader_arguments(parser):
+    parser.add_argument(
+        "--txt-indexes",
+        type=_indexes,
+        default=list(TXT_COLUMN_INDEXES),
+        help="comma-separated 0-based TXT field indexes (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--mapping",
+        choices=("fuzzy", "strict"),
+        default="fuzzy",
+        help="CSV/XLSM header matching (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--excel-reader",
+        choices=("auto", "openpyxl", "calamine", "pandas"),
+        default="auto",
+        help="XLSM/XLSX parser; auto uses calamine if installed, else "
+             "openpyxl read-only streaming; pandas reads the whole sheet "
+             "(default: %(default)s)"
+    )
+    for kind in ("csv", "txt"):
+        parser.add_argument(
+            f"--{kind}-encoding",
+            default=AUTO_ENCODING,
+            help=f"{kind.upper()} input encoding; auto detects utf-8-sig, "
+                 "utf-8 or cp1250 per file (default: %(default)s)"
+        )
+
+
+def _add_output_arguments(parser):
+    parser.add_argument(
+        "--outputs",
+        type=_formats,
+        default=OUTPUT_FORMATS,
+        help="comma-separated output formats (xlsx, csv, parquet, feather), "
+             "or 'none' for a dry run (default: xlsx,csv)"
+    )
+    parser.add_argument(
+        "--output-csv-encoding",
+        default="utf-8",
+        help="encoding of the CSV output (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--xlsx-writer",
+        choices=("auto", "openpyxl", "xlsxwriter", "pandas"),
+        default="auto",
+        help="XLSX backend; auto streams with xlsxwriter if installed, "
+             "else openpyxl write-only (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--delta",
+        choices=DELTA_FORMATS,
+        default=None,
+        help="also write <target>.added/.changed/.removed files with the "
+             "rows that differ from the previous run"
+    )
+
+
+def _add_pipeline_arguments(parser):
+    """Parsing, cache and store options shared by merge and watch."""
+    parser.add_argument(
+        "-j", "--workers",
+        type=int,
+        default=1,
+        help="parse input files in parallel with N workers (default: 1)"
+    )
+    parser.add_argument(
+        "--executor",
+        choices=("process", "thread"),
+        default="process",
+        help="pool type used with --workers > 1 (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--txt-reader",
+        choices=("pandas", "mmap"),
+        default="pandas",
+        help="TXT/TXT4 parser; mmap decodes only the selected fields of a "
+             "memory-mapped file (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--txt-range-workers",
+        type=int,
+        default=1,
+        help="with --txt-reader mmap, parse byte ranges of each file in N "
+             "processes (default: 1)"
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=CHUNK_ROWS,
+        help="rows parsed per batch from CSV/TXT inputs, 0 reads whole "
+             "files at once (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--header-cache",
+        default=HEADER_CACHE_PATH,
+        metavar="PATH",
+        help="JSON cache of resolved CSV header mappings "
+             "(default: %(default)s)"
+    )
+    parser.add_argument(
+        "--no-header-cache",
+        action="store_true",
+        help="resolve every CSV header from scratch"
+    )
+    parser.add_argument(
+        "--ingest-cache",
+        nargs="?",
+        const=INGEST_CACHE_DIR,
+        default=None,
+        metavar="DIR",
+        help="reuse the extracted rows of unchanged inputs from a cache "
+             f"folder (default folder: {INGEST_CACHE_DIR})"
+    )
+    parser.add_argument(
+        "--ingest-cache-mb",
+        type=int,
+        default=INGEST_CACHE_MB,
+        help="evict least recently used cache entries above this size "
+             "(default: %(default)s)"
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="experimental: keep repeated text columns as categoricals: "
+             "less memory, somewhat slower"
+    )
+    parser.add_argument(
+        "--history",
+        action="store_true",
+        help="with --incremental (always on in watch), record every "
+             "Cena/VAT change per Kod in the store's price history"
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="print per-stage, per-file and per-output timings and peak RSS"
+    )
+    parser.add_argument(
+        "--run-log", metavar="PATH", default=None,
+        help="append a JSON-lines record of every run to PATH "
+             f"(the GUI apps use {RUN_LOG_PATH})"
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m column_finder",
+        description="Merge CSV / TXT / TXT4 / XLSM files into XLSX / CSV."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    merge = commands.add_parser("merge", help="merge input files into a target")
+    merge.set_defaults(func=run_merge)
+    merge.add_argument("files", nargs="+", help="input files, oldest first")
+    merge.add_argument(
+        "-t", "--target",
+        help="target XLSX file (other outputs are written next to it)"
+    )
+    _add_column_arguments(merge)
+    _add_reader_arguments(merge)
+    _add_output_arguments(merge)
+    _add_pipeline_arguments(merge)
+    merge.add_argument(
+        "--no-dedupe",
+        action="store_true",
+        help="keep every row instead of the newest entry per Kod"
+    )
+    merge.add_argument(
+        "--ignore-existing",
+        action="store_true",
+        help="do not load rows from an existing target file"
+    )
+    merge.add_argument(
+        "--incremental",
+        action="store_true",
+        help="upsert into the <target>.sqlite store and rewrite outputs "
+             "only when its content changed"
+    )
+    merge.add_argument(
+        "--profile",
+        choices=PROFILERS,
+        default=None,
+        help="profile the run (use -j 1 to include parsing)"
+    )
+    merge.add_argument(
+        "--profile-output", metavar="PATH", default=None,
+        help="profile report file (default: <target>.prof or .html)"
+    )
+
+    export = commands.add_parser(
+        "export", help="regenerate outputs from the <target>.sqlite store"
+    )
+    export.set_defaults(func=run_export)
+    export.add_argument("-t", "--target", required=True, help="target XLSX file")
+    _add_column_arguments(export)
+    _add_output_arguments(export)
+
+    lookup = commands.add_parser(
+        "lookup", help="print stored rows of codes from the <target>.sqlite store"
+    )
+    lookup.set_defaults(func=run_lookup)
+    lookup.add_argument("codes", nargs="+", metavar="KOD", help="codes to look up")
+    lookup.add_argument("-t", "--target", required=True, help="target XLSX file")
+    _add_column_arguments(lookup)
+
+    history = commands.add_parser(
+        "history", help="print the recorded price changes of codes"
+    )
+    history.set_defaults(func=run_history)
+    history.add_argument("codes", nargs="+", metavar="KOD", help="codes to look up")
+    history.add_argument("-t", "--target", required=True, help="target XLSX file")
+    _add_column_arguments(history)
+
+    watch = commands.add_parser(
+        "watch", help="merge CSV/TXT/TXT4 files as they land in a folder"
+    )
+    watch.set_defaults(func=run_watch)
+    watch.add_argument("folder", help="drop folder to watch")
+    watch.add_argument("-t", "--target", required=True, help="target XLSX file")
+    _add_column_arguments(watch)
+    _add_reader_arguments(watch)
+    _add_output_arguments(watch)
+    _add_pipeline_arguments(watch)
+    watch.add_argument(
+        "--interval",
+        type=float,
+        default=WATCH_INTERVAL,
+        help="seconds between folder scans (default: %(default)s)"
+    )
+    watch.add_argument(
+        "--settle",
+        type=float,
+        default=SETTLE_SECONDS,
+        help="seconds a file must stay unchanged before it is merged "
+             "(default: %(default)s)"
+    )
+    watch.add_argument(
+        "--skip-existing",
+        action="store_true",
+        help="only merge files that arrive after the watch started"
+    )
+
+    clear = commands.add_parser(
+        "clear-cache", help="empty the ingest and header mapping caches"
+    )
+    clear.set_defaults(func=run_clear_cache)
+    clear.add_argument(
+        "--ingest-cache", default=INGEST_CACHE_DIR, metavar="DIR",
+        help="ingest cache folder (default: %(default)s)"
+    )
+    clear.add_argument(
+        "--header-cache", default=HEADER_CACHE_PATH, metavar="PATH",
+        help="header mapping cache file (default: %(default)s)"
+    )
+    return parser
+
+
+# ============================================================
+# COMMANDS
+# ============================================================
+
+def _merge_options(args, **kwargs):
+    """MergeOptions from the arguments shared by merge and watch."""
+    return MergeOptions(
+        columns=args.columns,
+        txt_column_indexes=args.txt_indexes,
+        mapping=args.mapping,
+        csv_encoding=args.csv_encoding,
+        txt_encoding=args.txt_encoding,
+        excel_reader=args.excel_reader,
+        compact=args.compact,
+        outputs=args.outputs,
+        output_csv_encoding=args.output_csv_encoding,
+        delta=args.delta,
+        xlsx_writer=args.xlsx_writer,
+        workers=args.workers,
+        executor=args.executor,
+        chunksize=args.chunksize,
+        txt_reader=args.txt_reader,
+        txt_range_workers=args.txt_range_workers,
+        header_cache=None if args.no_header_cache else args.header_cache,
+        ingest_cache=args.ingest_cache,
+        ingest_cache_mb=args.ingest_cache_mb,
+        history=args.history,
+        run_log=args.run_log,
+        **kwargs
+    )
+
+
+def run_merge(args):
+    options = _merge_options(
+        args,
+        dedupe=not args.no_dedupe,
+        include_target=not args.ignore_existing,
+        incremental=args.incremental,
+        profiler=args.profile,
+        profile_path=args.profile_output,
+    )
+    if options.outputs and not args.target:
+        print("error: --target is required unless --outputs none", file=sys.stderr)
+        return 2
+
+    result = merge_files(args.files, args.target, options)
+
+    print(f"Merged {len(args.files)} file(s) into {result.rows} row(s)")
+    if result.changed is not None:
+        print(f"  {result.changed} row(s) inserted or changed in the store")
+        if not result.outputs:
+            print("  outputs are up to date")
+    _print_outputs(result)
+    if args.workers > 1:
+        print("Parse time per worker:")
+        for worker, entry in worker_summary(result.timings).items():
+            print(
+                f"  {worker}: {entry['files']} file(s), {entry['rows']} row(s), "
+                f"{entry['seconds']:.3f}s"
+            )
+    if args.stats:
+        for line in format_stats(result):
+            print(line)
+    return 0
+
+
+def run_export(args):
+    options = MergeOptions(
+        columns=args.columns,
+        outputs=args.outputs,
+        output_csv_encoding=args.output_csv_encoding,
+        delta=args.delta,
+        xlsx_writer=args.xlsx_writer,
+    )
+    if not os.path.exists(store_path(args.target)):
+        print(f"error: no store found at {store_path(args.target)}", file=sys.stderr)
+        return 1
+
+    result = export_catalogue(args.target, options)
+
+    print(f"Exported {result.rows} row(s)")
+    _print_outputs(result)
+    return 0
+
+
+def run_lookup(args):
+    path = store_path(args.target)
+    if not os.path.exists(path):
+        print(f"error: no store found at {path}", file=sys.stderr)
+        return 1
+
+    missing = 0
+    with CatalogueStore(path, args.columns) as store:
+        for kod in args.codes:
+            row = store.lookup(kod)
+            if row is None:
+                print(f"{kod}: not found")
+                missing += 1
+                continue
+            print("; ".join(f"{name}={value or ''}" for name, value in row.items()))
+    return 1 if missing else 0
+
+
+def run_history(args):
+    path = store_path(args.target)
+    if not os.path.exists(path):
+        print(f"error: no store found at {path}", file=sys.stderr)
+        return 1
+
+    with CatalogueStore(path, args.columns) as store:
+        for kod in args.codes:
+            changes = store.history(kod)
+            print(f"{kod}: {len(changes)} change(s)")
+            for row in changes.itertuples(index=False):
+                values = ", ".join(
+                    f"{col} {row[2 * i + 1] or '-'} -> {row[2 * i + 2] or '-'}"
+                    for i, col in enumerate(store.tracked)
+                )
+                print(f"  {row.recorded_at}  {values}  ({row.source or '?'})")
+    return 0
+
+
+def run_watch(args):
+    options = _merge_options(args)
+
+    def merged(files, result):
+        names = ", ".join(os.path.basename(f) for f in files)
+        print(
+            f"[{time.strftime('%H:%M:%S')}] {names}: {result.changed} row(s) "
+            f"inserted or changed, {result.rows} in total"
+        )
+        _print_outputs(result)
+        if args.stats:
+            for line in format_stats(result):
+                print(f"  {line}")
+
+    def failed(error):
+        print(f"[{time.strftime('%H:%M:%S')}] error: {error}", file=sys.stderr)
+
+    print(f"Watching {args.folder} (Ctrl+C to stop)")
+    try:
+        watch_folder(
+            args.folder,
+            args.target,
+            options,
+            interval=args.interval,
+            settle=args.settle,
+            skip_existing=args.skip_existing,
+            on_merge=merged,
+            on_error=failed,
+        )
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def run_clear_cache(args):
+    freed = clear_ingest_cache(args.ingest_cache)
+    print(f"Ingest cache cleared ({freed / 2**20:.1f} MB freed)")
+    if clear_header_cache(args.header_cache):
+        print("Header mapping cache cleared")
+    return 0
+
+
+def _print_outputs(result):
+    for timing in result.output_timings:
+        print(f"  {timing.format}: {timing.path} ({timing.seconds:.3f}s)")
+    for kind, (path, rows) in result.delta.items():
+        print(f"  {kind}: {path} ({rows} row(s))")
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except MergeError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
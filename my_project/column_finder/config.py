@@ -0,0 +1,71 @@
+import os
+
+# ============================================================
+# SHARED CONFIGURATION
+# ============================================================
+
+# Column indexes for TXT / TXT4 files (0-based indexing)
+# Order: Kod, ProduktNazwa, Cena, VAT
+TXT_COLUMN_INDEXES = [0, 3, 2, 4]
+
+# Final column names used in output files
+TARGET_COLUMNS = ["Kod", "ProduktNazwa", "Cena", "VAT"]
+
+# Fixed column set copied by the XLSM merger
+XLSM_COLUMNS = ["Kod", "ProduktNazwa", "VAT", "CenaBrutto"]
+
+# Other source headers accepted for a target column: XLSM price lists
+# name the price "CenaBrutto"
+COLUMN_ALIASES = {"Cena": ["CenaBrutto"]}
+
+# Column used to keep only the newest entry per product
+KEY_COLUMN = "Kod"
+
+# Separator and encodings used by supplier files and outputs. "auto"
+# sniffs utf-8-sig / utf-8 / cp1250 per input file (see encoding.py) and
+# falls back to the CSV / TXT defaults when the sample is plain ASCII
+SEPARATOR = ";"
+AUTO_ENCODING = "auto"
+CSV_ENCODING = "cp1250"
+TXT_ENCODING = "utf-8"
+OUTPUT_CSV_ENCODING = "utf-8"
+
+# Parallel ingest workers used by the GUI apps (library default is 1)
+GUI_WORKERS = os.cpu_count() or 1
+
+# Rows parsed per batch when streaming input files (bounds peak memory)
+CHUNK_ROWS = 100_000
+
+# Persistent cache of resolved CSV header mappings used by the GUI apps
+# and the command line (see column_finder/header_cache.py)
+HEADER_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".column_finder", "header_mappings.json"
+)
+
+# Cache of already-extracted input files (folder and size limit in MB)
+INGEST_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".column_finder", "ingest_cache"
+)
+INGEST_CACHE_MB = 1024
+
+# JSON-lines log of every merge run by the GUI apps (timings, peak RSS)
+RUN_LOG_PATH = os.path.join(
+    os.path.expanduser("~"), ".column_finder", "runs.jsonl"
+)
+
+# Output formats written next to the target file
+OUTPUT_FORMATS = ("xlsx", "csv")
+
+# Every supported output format; Parquet and Feather (Arrow IPC) need pyarrow
+OUTPUT_FORMAT_CHOICES = ("xlsx", "csv", "parquet", "feather")
+
+# Low-cardinality columns stored dictionary-encoded in Parquet / Feather
+DICTIONARY_COLUMNS = ["ProduktNazwa", "VAT"]
+
+# Columns whose changes per code are recorded in the price history of the
+# incremental store (MergeOptions.history, see store.py)
+HISTORY_COLUMNS = ["Cena", "VAT"]
+
+# Formats of the added / changed / removed files written next to the full
+# export when MergeOptions.delta is set (see delta.py)
+DELTA_FORMATS = ("csv", "parquet")
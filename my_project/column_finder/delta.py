@@ -0,0 +1,227 @@
+import base64
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.util import hash_array
+
+from .config import DELTA_FORMATS, KEY_COLUMN
+from .writers import WRITERS, check_outputs
+
+
+# ============================================================
+# DELTA OUTPUTS
+# ============================================================
+#
+# Next to the full export, a merge can write only what changed since the
+# previous run: ``<target>.added.<fmt>`` and ``<target>.changed.<fmt>``
+# (full rows) and ``<target>.removed.<fmt>`` (codes only). Rows are keyed
+# by ``Kod`` and compared through a 64-bit hash of their values, so the
+# previous state kept in ``<target>.delta-state.json`` is just one code and
+# one hash per row. The first run has no previous state: every row is
+# "added".
+
+DELTA_KINDS = ("added", "changed", "removed")
+STATE_SUFFIX = ".delta-state.json"
+STATE_FORMAT = "column_finder.delta-state"
+STATE_VERSION = 1
+_KEY_HASH = "key_hash"
+_HASH = "hash"
+# Hashed into every state: if pandas ever hashes differently, saved row
+# hashes are not compared with new ones
+_CANARY = np.array(["Kod", "Cena 1,00", "VAT 23"], dtype=object)
+
+
+def delta_path(target, kind, fmt):
+    """Return the ``kind`` delta file written next to the target XLSX."""
+    return f"{os.path.splitext(target)[0]}.{kind}.{fmt}"
+
+
+def state_path(target):
+    """Return the file keeping the codes and row hashes of the last run."""
+    return os.path.splitext(target)[0] + STATE_SUFFIX
+
+
+def check_delta(fmt):
+    """Raise ValueError for an unknown delta format or a missing pyarrow."""
+    if fmt not in DELTA_FORMATS:
+        raise ValueError(
+            f"Unknown delta format: {fmt} (choose from {', '.join(DELTA_FORMATS)})"
+        )
+    check_outputs([fmt])
+
+
+def _value_columns(columns, key):
+    return [c for c in columns if c != key]
+
+
+def row_hashes(df, columns, key=KEY_COLUMN):
+    """Frame of ``key`` (as text), its hash and a hash of the other ``columns``.
+
+    Values are hashed as they are written (text, missing as ""), so a row
+    re-read from an XLSX with numbers keeps its hash. With duplicate codes
+    the first (newest) row is kept. The frame is labelled with row
+    positions in ``df``.
+    """
+    text = {}
+    for col in dict.fromkeys([key] + list(columns)):
+        values = df[col] if col in df.columns else pd.Series("", index=df.index)
+        text[col] = values.astype(object).where(values.notna(), "").astype(str)
+    text = pd.DataFrame(text, index=df.index)
+    values = _value_columns(columns, key)
+    # categorize=False: hashing near-unique text directly beats factorizing
+    state = pd.DataFrame({
+        key: text[key].to_numpy(),
+        _KEY_HASH: hash_array(text[key].to_numpy(object), categorize=False),
+        _HASH: pd.util.hash_pandas_object(
+            text[values], index=False, categorize=False
+        ).to_numpy(),
+    })
+    return state[~_duplicated(state, key)]
+
+
+def _key_hashes(codes):
+    return hash_array(np.asarray(codes, dtype=object), categorize=False)
+
+
+def _duplicated(state, key):
+    """Codes seen earlier in ``state``; hash matches are checked on the codes."""
+    same_hash = state[_KEY_HASH].duplicated(keep=False).to_numpy()
+    duplicated = np.zeros(len(state), dtype=bool)
+    if same_hash.any():
+        duplicated[same_hash] = state[key][same_hash].duplicated().to_numpy()
+    return duplicated
+
+
+def load_state(target, columns, key=KEY_COLUMN):
+    """Return the saved state of the last run, or ``None``.
+
+    Raises ValueError for a file of an unknown format or version. If the
+    compared columns or the hash function changed since it was saved,
+    the state has no row hashes: every kept code then counts as changed.
+    """
+    path = state_path(target)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        saved = json.load(f)
+    if saved.get("format") != STATE_FORMAT or saved.get("version") != STATE_VERSION:
+        raise ValueError(
+            f"Unsupported delta state {path} (delete it to start a new delta chain)"
+        )
+    codes = saved["codes"]
+    state = pd.DataFrame({key: pd.Series(codes, dtype=object)})
+    state[_KEY_HASH] = _key_hashes(codes)
+    comparable = (
+        saved["key"] == key
+        and saved["columns"] == _value_columns(columns, key)
+        and saved["canary"] == int(_key_hashes(_CANARY).sum())
+    )
+    if comparable:
+        hashes = base64.b64decode(saved["hashes"])
+        state[_HASH] = np.frombuffer(hashes, dtype="<u8").astype("uint64")
+    return state
+
+
+def save_state(target, state, columns, key=KEY_COLUMN):
+    """Write ``state`` as versioned JSON.
+
+    Codes are stored as a list, row hashes as base64 of little-endian
+    64-bit integers.
+    """
+    path = state_path(target)
+    saved = {
+        "format": STATE_FORMAT,
+        "version": STATE_VERSION,
+        "key": key,
+        "columns": _value_columns(columns, key),
+        "canary": int(_key_hashes(_CANARY).sum()),
+        "codes": state[key].tolist(),
+        "hashes": base64.b64encode(
+            state[_HASH].to_numpy().astype("<u8").tobytes()
+        ).decode("ascii"),
+    }
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        # dumps: the C encoder; json.dump streams through the slow one
+        f.write(json.dumps(saved, ensure_ascii=False))
+    os.replace(tmp, path)
+
+
+def _positions(previous, state, key):
+    """Position of every code of ``state`` in ``previous`` (-1: new code).
+
+    Codes are looked up by their 64-bit hashes, which is much faster than
+    comparing strings; every hash match is then checked on the codes
+    themselves, and on any collision the codes are matched directly.
+    """
+    index = pd.Index(previous[_KEY_HASH])
+    if index.is_unique:
+        position = index.get_indexer(state[_KEY_HASH])
+        found = position >= 0
+        if (
+            previous[key].to_numpy()[position[found]] == state[key].to_numpy()[found]
+        ).all():
+            return position
+    return pd.Index(previous[key]).get_indexer(state[key])
+
+
+def compute_delta(df, previous, columns, key=KEY_COLUMN):
+    """Compare ``df`` with the ``previous`` state.
+
+    Returns ``({kind: frame}, state)``: added and changed rows of ``df`` in
+    its order, removed codes, and the state of ``df`` to save.
+    """
+    state = row_hashes(df, columns, key)
+    if previous is None:
+        previous = state.iloc[:0]
+
+    position = _positions(previous, state, key)
+    known = position >= 0
+    if _HASH in previous:
+        changed = known.copy()
+        changed[known] = (
+            previous[_HASH].to_numpy()[position[known]]
+            != state[_HASH].to_numpy()[known]
+        )
+    else:
+        changed = known  # rows cannot be compared: resend every kept code
+    gone = np.ones(len(previous), dtype=bool)
+    gone[position[known]] = False
+    removed = previous[key].to_numpy()[gone]
+
+    rows = df.iloc[state.index]
+    frames = {
+        "added": rows[~known],
+        "changed": rows[changed],
+        "removed": pd.DataFrame({key: removed}),
+    }
+    return frames, state
+
+
+def write_delta(df, target, fmt, options, columns, key=KEY_COLUMN):
+    """Write the delta of ``df`` against the last run and save its state.
+
+    ``df`` ``None`` means nothing changed since the saved state: empty
+    delta files are written so stale ones are not applied twice. Returns
+    ``{kind: (path, rows)}``.
+    """
+    check_delta(fmt)
+    previous = load_state(target, columns, key)
+    if df is None:
+        frames = {kind: pd.DataFrame(columns=[key] if kind == "removed" else columns)
+                  for kind in DELTA_KINDS}
+        state = None
+    else:
+        frames, state = compute_delta(df, previous, columns, key)
+
+    written = {}
+    for kind in DELTA_KINDS:
+        path = delta_path(target, kind, fmt)
+        WRITERS[fmt](frames[kind], path, options)
+        written[kind] = (path, len(frames[kind]))
+    # The state moves on only once every delta file is written
+    if state is not None:
+        save_state(target, state, columns, key)
+    return written
@@ -0,0 +1,106 @@
+import codecs
+import os
+from dataclasses import replace
+from functools import lru_cache
+
+from .config import AUTO_ENCODING, CSV_ENCODING, TXT_ENCODING
+
+
+# ============================================================
+# INPUT ENCODING DETECTION
+# ============================================================
+
+SAMPLE_BYTES = 64 * 1024
+SCAN_BYTES = 2**20
+SNIFF_CACHE_SIZE = 4096
+
+
+def _valid_utf8(data):
+    # Incremental decoding accepts a character cut at the end of the sample
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        decoder.decode(data, final=False)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _from_char_start(data):
+    """Drop UTF-8 continuation bytes a sample may start in the middle of."""
+    skip = 0
+    while skip < min(3, len(data)) and 0x80 <= data[skip] <= 0xBF:
+        skip += 1
+    return data[skip:]
+
+
+def _scan_utf8(f, block_size=SCAN_BYTES):
+    """Return ``(ascii, valid)`` for the rest of ``f``, read in blocks.
+
+    Stops at the first byte that is not valid UTF-8.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    ascii = True
+    try:
+        for block in iter(lambda: f.read(block_size), b""):
+            ascii = ascii and block.isascii()
+            if not ascii:
+                decoder.decode(block, final=False)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return False, False
+    return ascii, True
+
+
+def sniff_encoding(path, sample_bytes=SAMPLE_BYTES):
+    """Guess the codec of a supplier file.
+
+    Returns "utf-8-sig" for a UTF-8 BOM, "utf-8" when the file decodes
+    strictly as UTF-8, "cp1250" when it does not, and ``None`` when it is
+    plain ASCII (any of the codecs reads it the same). The first and last
+    bytes are checked first; unless they already rule UTF-8 out, the whole
+    file is validated, so characters that only occur in the middle of the
+    file still count.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = f.read(sample_bytes)
+        if head.startswith(codecs.BOM_UTF8):
+            return "utf-8-sig"
+        tail = b""
+        if size > 2 * sample_bytes:
+            f.seek(size - sample_bytes)
+            tail = _from_char_start(f.read())
+        if not (_valid_utf8(head) and _valid_utf8(tail)):
+            return "cp1250"
+        f.seek(0)
+        ascii, valid = _scan_utf8(f)
+
+    if not valid:
+        return "cp1250"
+    return None if ascii else "utf-8"
+
+
+@lru_cache(maxsize=SNIFF_CACHE_SIZE)
+def _cached_sniff(path, stamp):
+    return sniff_encoding(path)
+
+
+def resolve_encoding(path, encoding, default):
+    """Return ``encoding``, or the sniffed codec of ``path`` for "auto".
+
+    The decision is cached per path, size and mtime; ``default`` is used
+    for pure-ASCII samples.
+    """
+    if encoding != AUTO_ENCODING:
+        return encoding
+    stat = os.stat(path)
+    return _cached_sniff(path, (stat.st_size, stat.st_mtime_ns)) or default
+
+
+def resolve_encodings(path, options):
+    """Return ``options`` with concrete CSV / TXT codecs for ``path``."""
+    csv_encoding = resolve_encoding(path, options.csv_encoding, CSV_ENCODING)
+    txt_encoding = resolve_encoding(path, options.txt_encoding, TXT_ENCODING)
+    if (csv_encoding, txt_encoding) == (options.csv_encoding, options.txt_encoding):
+        return options
+    return replace(options, csv_encoding=csv_encoding, txt_encoding=txt_encoding)
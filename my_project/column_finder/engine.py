@@ -0,0 +1,662 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from .compact import compact_frame, concat_compact
+from .config import KEY_COLUMN
+from .delta import check_delta, state_path, write_delta
+from .errors import MergeCancelled
+from .options import MergeOptions
+from .pools import bounded_map
+from .ingest_cache import read_cached_chunks
+from .readers import read_target, take_mapping_seconds
+from .stats import RunPeakRss, append_run_log, profile_path, profiled, run_record
+from .store import SOURCE_COLUMN, CatalogueStore, store_path
+from .writers import check_outputs, output_path, write_output
+
+
+@dataclass
+class MergeResult:
+    """Outcome of :func:`merge_files`."""
+
+    frame: pd.DataFrame
+    outputs: dict = field(default_factory=dict)
+    timings: list = field(default_factory=list)
+    # One :class:`OutputTiming` per written output, in ``outputs`` order
+    output_timings: list = field(default_factory=list)
+    # Wall-clock seconds per pipeline stage (see stats.run_stats), total
+    # run time and peak RSS of the process during the run in bytes
+    stages: dict = field(default_factory=dict)
+    seconds: float = None
+    peak_rss: int = None
+    # Incremental mode: rows inserted/changed in the store and its size
+    # (``frame`` is None when no export had to be regenerated)
+    changed: int = None
+    total_rows: int = None
+    # ``options.delta``: {"added" / "changed" / "removed": (path, rows)}
+    delta: dict = field(default_factory=dict)
+
+    @property
+    def rows(self):
+        if self.total_rows is not None:
+            return self.total_rows
+        return len(self.frame)
+
+
+@dataclass
+class Progress:
+    """Snapshot sent to the ``progress`` callback of :func:`merge_files`.
+
+    ``stage`` is "read" while input files are parsed (``done`` / ``total``
+    count files), then "dedupe" and "write" (``file`` is the output path).
+    """
+
+    stage: str
+    done: int
+    total: int
+    rows: int
+    elapsed: float
+    file: str = None
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        """Estimated seconds left in the read stage, ``None`` if unknown."""
+        if self.stage != "read" or not self.done:
+            return None
+        return self.elapsed / self.done * (self.total - self.done)
+
+
+@dataclass
+class FileTiming:
+    """Parse time of one input file and the worker that parsed it.
+
+    ``seconds`` includes ``mapping_seconds``, the time spent resolving the
+    column mapping from the header.
+    """
+
+    file: str
+    worker: str
+    seconds: float
+    rows: int
+    bytes: int = 0
+    mapping_seconds: float = 0.0
+
+
+@dataclass
+class OutputTiming:
+    """Write time of one output format."""
+
+    format: str
+    path: str
+    seconds: float
+
+
+def worker_summary(timings):
+    """Aggregate :class:`FileTiming` entries per worker.
+
+    Returns ``{worker: {"files": n, "rows": n, "seconds": s}}``.
+    """
+    summary = {}
+    for timing in timings:
+        entry = summary.setdefault(
+            timing.worker, {"files": 0, "rows": 0, "seconds": 0.0}
+        )
+        entry["files"] += 1
+        entry["rows"] += timing.rows
+        entry["seconds"] += timing.seconds
+    return summary
+
+
+class _Tracker:
+    """Report progress and honour cooperative cancellation."""
+
+    def __init__(self, total, progress=None, cancel=None):
+        self.total = total
+        self.progress = progress
+        self.cancel = cancel
+        self.done = 0
+        self.rows = 0
+        self.timings = []
+        self.stages = {}
+        self.started = time.perf_counter()
+
+    def check(self):
+        if self.cancel is not None and self.cancel.is_set():
+            raise MergeCancelled()
+
+    def add_stage(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name):
+        """Add the wall-clock time of the block to stage ``name``."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - started)
+
+    def report(self, stage, file=None):
+        if self.progress is not None:
+            self.progress(Progress(
+                stage, self.done, self.total, self.rows,
+                time.perf_counter() - self.started, file
+            ))
+
+
+# ============================================================
+# ROW COLLECTION
+# ============================================================
+
+class FrameCollector:
+    """Buffer per-file frames and concatenate them once.
+
+    Appending with ``pd.concat`` inside the file loop copies the whole
+    accumulated frame for every input, which is quadratic in total rows.
+    The collector only keeps references and materializes a single frame
+    with ``columns`` first (any extra columns follow in order of appearance).
+    With ``compact`` the buffered frames use the compact dtypes of
+    compact.py.
+    """
+
+    def __init__(self, columns, compact=False):
+        self.columns = list(columns)
+        self.compact = compact
+        self.frames = []
+        self.rows = 0
+
+    def add(self, df):
+        if not df.empty:
+            self.frames.append(compact_frame(df) if self.compact else df)
+            self.rows += len(df)
+
+    def frame(self):
+        if not self.frames:
+            return pd.DataFrame(columns=self.columns)
+
+        concat = concat_compact if self.compact else pd.concat
+        df = concat(self.frames, ignore_index=True)
+        extra = [c for c in df.columns if c not in self.columns]
+        return df.reindex(columns=self.columns + extra)
+
+
+# Buffered rows folded into the kept rows at least this often
+COMPACT_ROWS = 100_000
+
+
+class NewestRowCollector:
+    """Keep the newest row per ``key`` while frames arrive.
+
+    Equivalent to :func:`dedupe_newest` on the concatenation of every added
+    frame (same rows, order and index), but memory follows the number of
+    unique codes instead of the total row count: each frame is reduced to
+    its last row per code, and buffered frames are folded into the kept
+    rows with ``drop_duplicates(keep="last")`` once they outgrow them.
+    With ``compact`` the kept rows use the compact dtypes of compact.py.
+    """
+
+    def __init__(self, columns, key=KEY_COLUMN, compact_rows=COMPACT_ROWS,
+                 compact=False):
+        self.columns = list(columns)
+        self.key = key
+        self.compact_rows = compact_rows
+        self.compact = compact
+        self.kept = None  # latest row per code so far, oldest first
+        self.pending = []
+        self.pending_rows = 0
+        self.rows = 0
+
+    def add(self, df):
+        if df.empty:
+            return
+        # Label rows with their global position to rebuild the index later
+        start, self.rows = self.rows, self.rows + len(df)
+        df = df.set_axis(pd.RangeIndex(start, self.rows))
+        df = df.drop_duplicates(subset=self.key, keep="last")
+        if self.compact:
+            df = compact_frame(df)
+        self.pending.append(df)
+        self.pending_rows += len(df)
+        kept = 0 if self.kept is None else len(self.kept)
+        if self.pending_rows > max(kept, self.compact_rows):
+            self._compact()
+
+    def _compact(self):
+        if not self.pending:
+            return
+        frames = self.pending if self.kept is None else [self.kept] + self.pending
+        concat = concat_compact if self.compact else pd.concat
+        df = concat(frames) if len(frames) > 1 else frames[0]
+        self.kept = df.drop_duplicates(subset=self.key, keep="last")
+        self.pending = []
+        self.pending_rows = 0
+
+    def frame(self):
+        self._compact()
+        if self.kept is None:
+            return pd.DataFrame(columns=self.columns)
+
+        # Newest on top, labelled like ``iloc[::-1].reset_index(drop=True)``
+        df = self.kept.iloc[::-1]
+        df = df.set_axis(self.rows - 1 - df.index)
+        extra = [c for c in df.columns if c not in self.columns]
+        return df.reindex(columns=self.columns + extra)
+
+
+# ============================================================
+# INGEST
+# ============================================================
+
+# Files submitted to the pool ahead of the one being collected
+IN_FLIGHT_PER_WORKER = 2
+
+EXECUTORS = {
+    "process": ProcessPoolExecutor,
+    "thread": ThreadPoolExecutor,
+}
+
+
+def _read_timed(path, options, sink=None, check=None):
+    """Read one input and return ``(chunks, FileTiming)``; runs in workers.
+
+    With a ``sink`` every chunk is handed over as soon as it is parsed and
+    ``chunks`` stays empty, so a file is never held in memory as a whole;
+    ``check`` is called between chunks. The timing counts parsing (or
+    loading from the ingest cache) only.
+    """
+    worker = f"{os.getpid()}/{threading.current_thread().name}"
+    chunks = []
+    rows = 0
+    seconds = 0.0
+    take_mapping_seconds()  # drop time of mappings done outside this read
+    reader = read_cached_chunks(path, options)
+    while True:
+        started = time.perf_counter()
+        chunk = next(reader, None)
+        seconds += time.perf_counter() - started
+        if chunk is None:
+            break
+        rows += len(chunk)
+        if sink is None:
+            chunks.append(chunk)
+        else:
+            sink(chunk)
+        if check is not None:
+            check()
+    return chunks, FileTiming(
+        path, worker, seconds, rows,
+        bytes=os.path.getsize(path),
+        mapping_seconds=take_mapping_seconds()
+    )
+
+
+def iter_inputs(files, options, tracker, sink=None):
+    """Yield ``(path, chunks, timing)`` for ``files`` in their original order.
+
+    ``chunks`` are the frames of one file as parsed, in batches of
+    ``options.chunksize`` rows. Sequential ingest passes them to
+    ``sink(chunk, path)`` instead (when given) while the file is being read. With
+    ``options.workers > 1`` the files are parsed concurrently in a process
+    or thread pool, but results are still consumed in input order because
+    "newest entry wins" deduplication depends on it. At most
+    ``IN_FLIGHT_PER_WORKER`` files per worker are parsed ahead of the
+    consumer, so a large batch is never held in memory at once.
+    """
+    if options.workers <= 1 or len(files) <= 1:
+        for file in files:
+            tracker.check()
+            file_sink = None if sink is None else (
+                lambda chunk, file=file: sink(chunk, file)
+            )
+            yield (file, *_read_timed(file, options, file_sink, tracker.check))
+        return
+
+    if options.executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor: {options.executor}")
+
+    workers = min(options.workers, len(files))
+    pool = EXECUTORS[options.executor](max_workers=workers)
+    try:
+        # Each result is a whole parsed file: keep only a few ahead
+        results = bounded_map(
+            pool, _read_timed, ((file, options) for file in files),
+            IN_FLIGHT_PER_WORKER * workers
+        )
+        for file, result in zip(files, results):
+            tracker.check()
+            yield (file, *result)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _collect_stage(collector):
+    return "dedupe" if isinstance(collector, NewestRowCollector) else "concat"
+
+
+def ingest(files, options, tracker, collector, source_column=None):
+    """Parse ``files`` into ``collector`` and report per-file progress.
+
+    Time spent in ``collector`` goes to its own stage, the rest to "read".
+    With ``source_column`` every row is tagged with the path of its file.
+    """
+    collect = _collect_stage(collector)
+
+    def add(df, file):
+        with tracker.stage(collect):
+            if source_column is not None:
+                df = df.assign(**{source_column: file})
+            collector.add(df)
+
+    started = time.perf_counter()
+    collected = tracker.stages.get(collect, 0.0)
+    try:
+        for file, chunks, timing in iter_inputs(files, options, tracker, add):
+            for chunk in chunks:
+                add(chunk, file)
+            tracker.timings.append(timing)
+            tracker.done += 1
+            tracker.rows += timing.rows
+            tracker.report("read", file)
+    finally:
+        collected = tracker.stages.get(collect, 0.0) - collected
+        tracker.add_stage("read", time.perf_counter() - started - collected)
+
+
+# ============================================================
+# DEDUPLICATION
+# ============================================================
+
+def dedupe_newest(df, key=KEY_COLUMN):
+    """Put the newest entries on top and keep one row per ``key``.
+
+    Works on a complete frame; the merge pipeline streams rows through
+    :class:`NewestRowCollector` instead, which gives the same result.
+    """
+    df = df.iloc[::-1].reset_index(drop=True)
+    return df.drop_duplicates(subset=key, keep="first")
+
+
+class ChangeCollector(NewestRowCollector):
+    """:class:`NewestRowCollector` that also keeps the changes of ``tracked``.
+
+    Before a frame is reduced to its last row per code, the rows whose
+    tracked values differ from the previous row of the same code in that
+    frame (and the first row of every code) are set aside, with the key
+    and any extra columns such as the source file. :meth:`changes` returns
+    them in arrival order for :meth:`CatalogueStore.record_changes`, which
+    compares them across frames and with the stored values.
+    """
+
+    def __init__(self, columns, tracked, key=KEY_COLUMN, **kwargs):
+        super().__init__(columns, key, **kwargs)
+        self.tracked = [c for c in tracked if c in self.columns and c != key]
+        self.changed = []
+
+    def add(self, df):
+        if not df.empty and self.tracked:
+            values = df[self.tracked].astype(str)
+            previous = values.groupby(df[self.key].to_numpy(), sort=False).shift()
+            extra = [c for c in df.columns if c not in self.columns]
+            self.changed.append(df.loc[
+                values.ne(previous).any(axis=1), [self.key] + self.tracked + extra
+            ])
+        super().add(df)
+
+    def changes(self):
+        if not self.changed:
+            return None
+        return pd.concat(self.changed, ignore_index=True)
+
+
+# ============================================================
+# MERGE PIPELINE
+# ============================================================
+
+def merge_frames(files, target=None, options=None, progress=None,
+                 cancel=None, _tracker=None):
+    """Read ``files`` (plus the existing target) into one frame.
+
+    Files are appended in the given order, so with ``options.dedupe`` the
+    last occurrence of a code wins. ``progress`` is called with a
+    :class:`Progress` after every file; ``cancel`` is any object with an
+    ``is_set()`` method (e.g. ``threading.Event``) and is checked between
+    files (and between chunks of a file in sequential mode), raising
+    :class:`~column_finder.errors.MergeCancelled`.
+    """
+    options = options or MergeOptions()
+    tracker = _tracker or _Tracker(len(files), progress, cancel)
+
+    if options.dedupe:
+        collector = NewestRowCollector(options.columns, compact=options.compact)
+    else:
+        collector = FrameCollector(options.columns, compact=options.compact)
+    if options.include_target and target:
+        with tracker.stage("target"):
+            existing = read_target(target)
+            if existing is not None:
+                collector.add(existing)
+
+    ingest(files, options, tracker, collector)
+
+    tracker.check()
+    if options.dedupe:
+        tracker.report("dedupe")
+    with tracker.stage(_collect_stage(collector)):
+        return collector.frame()
+
+
+def merge_files(files, target=None, options=None, progress=None, cancel=None):
+    """Merge ``files`` and write the configured outputs next to ``target``.
+
+    Raises :class:`~column_finder.errors.MergeError` for the first input
+    that cannot be read; nothing is written in that case. Cancellation is
+    honoured up to the moment the first output is written; once writing
+    has started every output is completed so they stay consistent.
+
+    The result carries per-file, per-stage and per-output timings and the
+    peak RSS. With ``options.run_log`` every run (including failed and
+    cancelled ones) is appended to that JSON-lines file; with
+    ``options.profiler`` the run is profiled (see :func:`stats.profiled`).
+    """
+    options = options or MergeOptions()
+    check_outputs(options.outputs)
+    if options.outputs and not target and not options.incremental:
+        raise ValueError("A target file is required to write outputs")
+    if options.history and not options.incremental:
+        raise ValueError("Price history needs incremental mode")
+    if options.delta:
+        check_delta(options.delta)
+        if not target:
+            raise ValueError("A target file is required to write deltas")
+
+    merge = merge_incremental if options.incremental else _merge
+    started = time.perf_counter()
+    status, result, error = "error", None, None
+    rss = RunPeakRss()
+    try:
+        with rss, profiled(options.profiler,
+                           profile_path(options.profiler, target, options.profile_path)):
+            result = merge(files, target, options, progress, cancel)
+        result.seconds = time.perf_counter() - started
+        result.peak_rss = rss.peak
+        status = "ok"
+        return result
+    except MergeCancelled:
+        status = "cancelled"
+        raise
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        if options.run_log:
+            append_run_log(options.run_log, run_record(
+                files, target, options, status,
+                time.perf_counter() - started, result, error, rss.peak
+            ))
+
+
+def _merge(files, target, options, progress=None, cancel=None):
+    tracker = _Tracker(len(files), progress, cancel)
+    target_df = merge_frames(files, target, options, _tracker=tracker)
+
+    tracker.check()
+    written, output_timings = write_outputs_concurrently(
+        target_df, target, options.outputs, options, tracker
+    )
+    result = MergeResult(
+        target_df, written, tracker.timings, output_timings, tracker.stages
+    )
+    if options.delta:
+        with tracker.stage("delta"):
+            result.delta = write_delta(
+                target_df, target, options.delta, options, options.columns
+            )
+    return result
+
+
+# ============================================================
+# OUTPUTS
+# ============================================================
+
+def write_outputs_concurrently(df, target, formats, options, tracker=None):
+    """Write ``df`` in every format of ``formats`` next to ``target``.
+
+    Independent outputs are written at the same time from the same frame
+    (one thread each), so a fast CSV or Parquet export does not wait for
+    the XLSX. Every output is completed even if another one fails; the
+    first error (in ``formats`` order) is then re-raised. Returns
+    ``({fmt: path}, [OutputTiming, ...])``.
+    """
+    tracker = tracker or _Tracker(0)
+
+    def write(fmt):
+        path = output_path(target, fmt)
+        tracker.report("write", path)
+        started = time.perf_counter()
+        write_output(df, target, fmt, options)
+        return OutputTiming(fmt, path, time.perf_counter() - started)
+
+    with tracker.stage("write"):
+        if len(formats) <= 1:
+            timings = [write(fmt) for fmt in formats]
+        else:
+            with ThreadPoolExecutor(max_workers=len(formats),
+                                    thread_name_prefix="output") as pool:
+                futures = [pool.submit(write, fmt) for fmt in formats]
+            timings = [future.result() for future in futures]
+    return {t.format: t.path for t in timings}, timings
+
+
+# ============================================================
+# INCREMENTAL MERGE (SIDECAR STORE)
+# ============================================================
+
+def merge_incremental(files, target, options, progress=None, cancel=None):
+    """Upsert ``files`` into the sidecar store and refresh stale exports.
+
+    The first run seeds the store from an existing target XLSX. Later runs
+    never read the XLSX again: the newest row per ``Kod`` of the batch is
+    upserted, with the file it came from, in one transaction (rolled back
+    on error or cancellation); with ``options.history`` the changes of the
+    tracked columns are appended to the price history first. An output is
+    rewritten only if the store changed since it was last exported or the
+    file is missing.
+    """
+    if not target:
+        raise ValueError("Incremental mode needs a target file")
+    if not options.dedupe:
+        raise ValueError("Incremental mode always keeps one row per code")
+
+    tracker = _Tracker(len(files), progress, cancel)
+    with CatalogueStore(store_path(target), options.columns) as store:
+        changed = 0
+        try:
+            if options.include_target and store.count() == 0:
+                with tracker.stage("target"):
+                    existing = read_target(target)
+                    if existing is not None:
+                        # Target is newest-first; replay it oldest-first
+                        existing = existing.iloc[::-1]
+                        if options.history:
+                            store.record_changes(existing, target)
+                        changed += store.upsert(existing, target)
+
+            if options.history:
+                collector = ChangeCollector(
+                    options.columns, store.tracked, compact=options.compact
+                )
+            else:
+                collector = NewestRowCollector(
+                    options.columns, compact=options.compact
+                )
+            ingest(files, options, tracker, collector, SOURCE_COLUMN)
+            tracker.check()
+
+            # Upsert only the latest row per code, oldest first, so codes
+            # repeated across the batch are written once
+            tracker.report("dedupe")
+            with tracker.stage("dedupe"):
+                latest = collector.frame().iloc[::-1]
+            with tracker.stage("store"):
+                if options.history:
+                    store.record_changes(collector.changes())
+                changed += store.upsert(latest)
+            tracker.check()
+        except BaseException:
+            store.rollback()
+            raise
+        store.commit(changed > 0)
+
+        return _export_store(store, target, options, tracker, changed)
+
+
+def export_catalogue(target, options=None, force=True):
+    """Write the outputs of ``target`` from its sidecar store."""
+    options = options or MergeOptions()
+    check_outputs(options.outputs)
+    if options.delta:
+        check_delta(options.delta)
+    with CatalogueStore(store_path(target), options.columns) as store:
+        tracker = _Tracker(0)
+        return _export_store(store, target, options, tracker, 0, force)
+
+
+def _export_store(store, target, options, tracker, changed, force=False):
+    stale = [
+        fmt for fmt in options.outputs
+        if force or store.stale(fmt) or not os.path.exists(output_path(target, fmt))
+    ]
+    # The delta is computed only if the store changed since the saved state
+    delta_stale = bool(options.delta) and (
+        force or store.stale("delta") or not os.path.exists(state_path(target))
+    )
+
+    with tracker.stage("store"):
+        frame = store.frame() if stale or delta_stale else None
+    written, output_timings = write_outputs_concurrently(
+        frame, target, stale, options, tracker
+    )
+    for fmt in written:
+        store.mark_exported(fmt)
+
+    result = MergeResult(
+        frame, written, tracker.timings, output_timings, tracker.stages,
+        changed=changed, total_rows=store.count()
+    )
+    if options.delta:
+        with tracker.stage("delta"):
+            result.delta = write_delta(
+                frame if delta_stale else None, target, options.delta,
+                options, options.columns
+            )
+        store.mark_exported("delta")
+    return result
@@ -0,0 +1,29 @@
+import os
+
+
+class MergeError(Exception):
+    """Raised when an input file cannot be turned into merge rows."""
+
+    def __init__(self, path, reason):
+        super().__init__(f"{os.path.basename(path)}: {reason}")
+        self.path = path
+        self.reason = reason
+
+    def __reduce__(self):
+        # Keep the exception picklable across process-pool workers
+        return type(self), (self.path, self.reason)
+
+
+class MissingColumnsError(MergeError):
+    """Raised in strict mapping mode when required columns are absent."""
+
+    def __init__(self, path, missing):
+        super().__init__(path, f"missing columns: {missing}")
+        self.missing = missing
+
+    def __reduce__(self):
+        return type(self), (self.path, self.missing)
+
+
+class MergeCancelled(Exception):
+    """Raised when a merge is cancelled before its outputs are written."""
@@ -0,0 +1,148 @@
+import importlib.util
+import itertools
+from datetime import date, datetime
+
+import numpy as np
+from pandas.io.parsers import TextParser
+
+
+# ============================================================
+# STREAMING XLSM / XLSX READER
+# ============================================================
+#
+# ``pd.read_excel`` converts every cell of the sheet and infers types for
+# every column, although the merge keeps four of them. The sheet reader
+# below finds the header row first and then converts only the cells of the
+# requested columns; the kept cells go through pandas' own ``TextParser``,
+# so values and dtypes are the ones ``read_excel`` would produce.
+
+def excel_engine(name="auto"):
+    """Resolve "auto" to calamine when installed, else streaming openpyxl."""
+    if name != "auto":
+        return name
+    if importlib.util.find_spec("python_calamine") is not None:
+        return "calamine"
+    return "openpyxl"
+
+
+def _openpyxl_cell(cell):
+    # Same conversion as pandas' openpyxl reader
+    from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+    if cell.value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return np.nan
+    if cell.data_type == TYPE_NUMERIC:
+        val = int(cell.value)
+        return val if val == cell.value else float(cell.value)
+    return cell.value
+
+
+def _calamine_cell(value):
+    # Same conversion as pandas' calamine reader
+    if isinstance(value, float):
+        val = int(value)
+        return val if val == value else value
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    return value
+
+
+def _openpyxl_rows(path):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = wb.worksheets[0]
+        sheet.reset_dimensions()
+        for row in sheet.rows:
+            yield row
+    finally:
+        wb.close()
+
+
+def _calamine_rows(path):
+    from python_calamine import load_workbook
+
+    wb = load_workbook(path)
+    try:
+        sheet = wb.get_sheet_by_index(0)
+        yield from sheet.to_python(skip_empty_area=False)
+    finally:
+        wb.close()
+
+
+_ENGINES = {
+    # rows, cell conversion, empty-cell test
+    "openpyxl": (_openpyxl_rows, _openpyxl_cell, lambda cell: cell.value is None),
+    "calamine": (_calamine_rows, _calamine_cell, lambda value: value == ""),
+}
+
+
+def _used_width(row, empty):
+    """Number of cells up to the last non-empty one."""
+    for i in range(len(row) - 1, -1, -1):
+        if not empty(row[i]):
+            return i + 1
+    return 0
+
+
+class SheetReader:
+    """Read selected columns of the first sheet of a workbook.
+
+    ``header`` holds the column names of the first non-empty row (as
+    ``read_excel`` names them, e.g. "Unnamed: 3" or "Kod.1"), or ``None``
+    for an empty sheet; leading empty rows are skipped. :meth:`read` then
+    streams the remaining rows once, converting only the requested
+    columns. ``engine`` is "openpyxl" (read-only streaming), "calamine"
+    (needs python-calamine) or "auto".
+    """
+
+    def __init__(self, path, engine="auto"):
+        name = excel_engine(engine)
+        if name not in _ENGINES:
+            raise ValueError(f"Unknown Excel reader: {engine}")
+        open_rows, self.convert, self.empty = _ENGINES[name]
+        self.rows = open_rows(path)
+        self.header = None
+        try:
+            for row in self.rows:
+                width = _used_width(row, self.empty)
+                if width:
+                    values = [self.convert(cell) for cell in row[:width]]
+                    self.header = TextParser([values], header=0).read().columns
+                    break
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.rows.close()
+
+    def read(self, columns, nrows=None):
+        """Return a frame with the ``columns`` of the header, in that order.
+
+        ``nrows`` stops after that many rows (for previews).
+        """
+        positions = [self.header.get_loc(col) for col in columns]
+        data = []
+        last = -1
+        for row in itertools.islice(self.rows, nrows):
+            if any(not self.empty(cell) for cell in row):
+                last = len(data)
+            data.append([
+                self.convert(row[p]) if p < len(row) else "" for p in positions
+            ])
+        # Trailing empty rows are dropped, empty rows in between are kept
+        # (as NaN rows), like read_excel
+        del data[last + 1:]
+        return TextParser(
+            [list(columns)] + data, header=0, skip_blank_lines=False
+        ).read()
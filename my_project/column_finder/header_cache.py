@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+
+# ============================================================
+# PERSISTENT HEADER -> COLUMN MAPPING CACHE
+# ============================================================
+
+MAX_ENTRIES = 10_000
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def header_signature(header_line, options):
+    """Hash a raw CSV header line with everything its mapping depends on."""
+    digest = hashlib.blake2b(header_line, digest_size=16)
+    digest.update(json.dumps([
+        options.csv_encoding, options.mapping, list(options.columns),
+        options.aliases
+    ], sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def get_cache(path):
+    """Return the process-wide :class:`HeaderCache` for ``path``."""
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = HeaderCache(path)
+        return _caches[path]
+
+
+def clear_header_cache(path):
+    """Delete the header cache at ``path``; returns True if it existed."""
+    existed = os.path.exists(path)
+    get_cache(path).clear()
+    return existed
+
+
+class HeaderCache:
+    """Resolved column mappings keyed by :func:`header_signature`.
+
+    Entries hold ``mapped_cols``, ``missing`` and the ``usecols`` positions
+    of a header, so a file whose header line was seen before (in this run
+    or an earlier one) skips header parsing and mapping entirely. The JSON
+    file is re-read and merged before every save, which keeps entries added
+    concurrently by other processes; at most ``MAX_ENTRIES`` newest entries
+    are kept.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def get(self, signature):
+        """Return ``(mapped_cols, missing, usecols)`` or ``None``."""
+        with self.lock:
+            entry = self.entries.get(signature)
+        if entry is None:
+            return None
+        return dict(entry["mapped"]), list(entry["missing"]), list(entry["usecols"])
+
+    def put(self, signature, mapped_cols, missing, usecols):
+        entry = {
+            "mapped": [[str(src), dst] for src, dst in mapped_cols.items()],
+            "missing": list(missing),
+            "usecols": [int(i) for i in usecols],
+        }
+        with self.lock:
+            self.entries[signature] = entry
+            self._save()
+
+    def clear(self):
+        with self.lock:
+            self.entries = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def _save(self):
+        entries = self._load()
+        entries.update(self.entries)
+        entries = dict(list(entries.items())[-MAX_ENTRIES:])
+        self.entries = entries
+
+        folder = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.remove(tmp)
+            raise
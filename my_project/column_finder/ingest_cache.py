@@ -0,0 +1,314 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from .readers import read_input_chunks
+
+
+# ============================================================
+# PERSISTENT INGEST CACHE
+# ============================================================
+#
+# The already-extracted columns of every input file are kept in a cache
+# folder, so re-merging an unchanged file only loads its rows. Entries are
+# Parquet files when pyarrow is installed (columnar, compressed) and a
+# stream of pickled chunks otherwise.
+
+CACHE_VERSION = 1
+INDEX_NAME = "index.sqlite"
+
+
+def cache_format():
+    """Return "parquet" when pyarrow is installed, else "pickle"."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return "pickle"
+    return "parquet"
+
+
+DIGEST_BLOCK = 2**20
+
+
+def file_digest(path):
+    """Fast content hash (blake2b) of a file."""
+    # Read in blocks: hashlib.file_digest needs Python 3.11
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(DIGEST_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def options_signature(options):
+    """Hash the options that change what a reader extracts from a file."""
+    fields = [
+        CACHE_VERSION,
+        list(options.columns),
+        list(options.txt_column_indexes),
+        options.mapping,
+        options.aliases,
+        options.csv_encoding,
+        options.txt_encoding,
+        options.excel_reader,
+    ]
+    return hashlib.blake2b(
+        json.dumps(fields, sort_keys=True).encode("utf-8"), digest_size=8
+    ).hexdigest()
+
+
+class IngestCache:
+    """Extracted input frames keyed by file content and reader options.
+
+    A SQLite index maps ``(path, options)`` to the size, mtime and content
+    hash seen last time: a file with the same size and mtime is a hit
+    without being read at all, otherwise its content is hashed, so a copied
+    or touched but identical file is still a hit. Entries are evicted least
+    recently used first once the folder exceeds ``max_bytes``.
+    """
+
+    def __init__(self, folder, max_bytes):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        os.makedirs(folder, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(folder, INDEX_NAME), timeout=60)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, file TEXT NOT NULL, "
+            "bytes INTEGER NOT NULL, used REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT NOT NULL, options TEXT NOT NULL, size INTEGER NOT NULL, "
+            "mtime_ns INTEGER NOT NULL, key TEXT NOT NULL, "
+            "PRIMARY KEY (path, options))"
+        )
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    # --------------------------------------------------------
+    # lookup
+    # --------------------------------------------------------
+
+    def key_for(self, path, options):
+        """Return the entry key of ``path`` as it is on disk now."""
+        path = os.path.abspath(path)
+        signature = options_signature(options)
+        stat = os.stat(path)
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, key FROM files WHERE path = ? AND options = ?",
+            (path, signature)
+        ).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+
+        key = f"{file_digest(path)}-{signature}"
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+            (path, signature, stat.st_size, stat.st_mtime_ns, key)
+        )
+        self.conn.commit()
+        return key
+
+    def entry_file(self, key):
+        """Return the entry file of ``key`` (marked as used) or ``None``."""
+        row = self.conn.execute(
+            "SELECT file FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        path = os.path.join(self.folder, row[0])
+        if not os.path.exists(path):
+            self._forget(key)
+            return None
+        self.conn.execute(
+            "UPDATE entries SET used = ? WHERE key = ?", (time.time(), key)
+        )
+        self.conn.commit()
+        return path
+
+    def load(self, path, chunksize=None):
+        """Yield the cached frames stored in entry file ``path``."""
+        if os.path.getsize(path) == 0:
+            return  # input without rows
+        if path.endswith(".parquet"):
+            import pyarrow.parquet as pq
+
+            parquet = pq.ParquetFile(path)
+            if chunksize:
+                for batch in parquet.iter_batches(batch_size=chunksize):
+                    yield batch.to_pandas()
+            else:
+                yield parquet.read().to_pandas()
+            return
+
+        with open(path, "rb") as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+
+    # --------------------------------------------------------
+    # storage
+    # --------------------------------------------------------
+
+    def writer(self, key):
+        """Return an :class:`_EntryWriter` that stores chunks under ``key``."""
+        return _EntryWriter(self, key, cache_format())
+
+    def _add(self, key, name):
+        size = os.path.getsize(os.path.join(self.folder, name))
+        self.conn.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+            (key, name, size, time.time())
+        )
+        self.conn.commit()
+        self.evict()
+
+    def _forget(self, key):
+        self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        self.conn.commit()
+
+    def size(self):
+        """Total bytes of all cached entries."""
+        return self.conn.execute(
+            "SELECT COALESCE(SUM(bytes), 0) FROM entries"
+        ).fetchone()[0]
+
+    def evict(self):
+        """Drop least recently used entries until under ``max_bytes``."""
+        total = self.size()
+        rows = self.conn.execute(
+            "SELECT key, file, bytes FROM entries ORDER BY used"
+        ).fetchall()
+        for key, name, size in rows:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.folder, name))
+            except FileNotFoundError:
+                pass
+            self._forget(key)
+            total -= size
+
+    def clear(self):
+        """Remove every entry; returns the number of bytes freed."""
+        freed = self.size()
+        self.conn.execute("DELETE FROM entries")
+        self.conn.execute("DELETE FROM files")
+        self.conn.commit()
+        for name in os.listdir(self.folder):
+            if not name.startswith(INDEX_NAME):
+                path = os.path.join(self.folder, name)
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    os.remove(path)
+        return freed
+
+
+class _EntryWriter:
+    """Write one entry chunk by chunk into a temporary file.
+
+    :meth:`commit` publishes the file atomically; :meth:`abort` (or a chunk
+    that cannot be stored, e.g. mixed types in a Parquet column) drops it.
+    """
+
+    def __init__(self, cache, key, fmt):
+        self.cache = cache
+        self.key = key
+        self.name = f"{key}.{'parquet' if fmt == 'parquet' else 'pkl'}"
+        fd, self.tmp = tempfile.mkstemp(dir=cache.folder, suffix=".tmp")
+        self.file = os.fdopen(fd, "wb")
+        self.parquet = None
+        self.fmt = fmt
+        self.failed = False
+
+    def write(self, df):
+        if self.failed:
+            return
+        try:
+            if self.fmt == "parquet":
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if self.parquet is None:
+                    self.parquet = pq.ParquetWriter(self.file, table.schema)
+                self.parquet.write_table(table)
+            else:
+                pickle.dump(df.reset_index(drop=True), self.file,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            self.failed = True
+
+    def commit(self):
+        if self.failed:
+            self.abort()
+            return
+        if self.parquet is not None:
+            self.parquet.close()
+        self.file.close()
+        os.replace(self.tmp, os.path.join(self.cache.folder, self.name))
+        self.cache._add(self.key, self.name)
+
+    def abort(self):
+        try:
+            if self.parquet is not None:
+                self.parquet.close()
+            self.file.close()
+        finally:
+            if os.path.exists(self.tmp):
+                os.remove(self.tmp)
+
+
+def read_cached_chunks(path, options):
+    """Like :func:`~column_finder.readers.read_input_chunks`, through the cache.
+
+    With ``options.ingest_cache`` unset this is a plain read. A miss parses
+    the file as usual and stores every chunk while it streams through; a
+    read that fails or is abandoned leaves no entry behind.
+    """
+    if not options.ingest_cache:
+        yield from read_input_chunks(path, options)
+        return
+
+    with IngestCache(options.ingest_cache, options.ingest_cache_mb * 2**20) as cache:
+        key = cache.key_for(path, options)
+        entry = cache.entry_file(key)
+        if entry is not None:
+            yield from cache.load(entry, options.chunksize)
+            return
+
+        writer = cache.writer(key)
+        try:
+            for chunk in read_input_chunks(path, options):
+                writer.write(chunk)
+                yield chunk
+        except BaseException:
+            writer.abort()
+            raise
+        writer.commit()
+
+
+def clear_ingest_cache(folder):
+    """Empty the ingest cache in ``folder``; returns the bytes freed."""
+    if not os.path.isdir(folder):
+        return 0
+    with IngestCache(folder, 0) as cache:
+        return cache.clear()
+
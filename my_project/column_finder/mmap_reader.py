@@ -0,0 +1,176 @@
+import codecs
+import mmap
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .config import SEPARATOR
+from .pools import bounded_map
+
+
+# ============================================================
+# MEMORY-MAPPED TXT / TXT4 READER
+# ============================================================
+#
+# The file is mapped read-only and split into newline-aligned byte ranges.
+# In each range the ';' and line break offsets are found with numpy, the
+# bytes of the selected fields are gathered per column and every column is
+# decoded with a single ``bytes.decode`` call; unused fields are never
+# decoded.
+
+RANGE_BYTES = 2**20
+
+_SEP = ord(SEPARATOR)
+_NL = ord("\n")
+_CR = ord("\r")
+
+
+def byte_ranges(mm, size, range_bytes=RANGE_BYTES):
+    """Split ``mm`` into ``(start, end)`` ranges ending after a newline."""
+    ranges = []
+    start = 0
+    while start < size:
+        end = start + range_bytes
+        if end >= size:
+            end = size
+        else:
+            newline = mm.find(b"\n", end)
+            end = size if newline == -1 else newline + 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _gather(buf, starts, ends):
+    """Bytes of every ``buf[start:end]`` field, each followed by '\\n'."""
+    lengths = ends - starts
+    sizes = lengths + 1
+    offsets = np.cumsum(sizes) - sizes
+    total = int(sizes.sum())
+    if not total:
+        return b""
+    # For output byte i of field f: source = starts[f] + (i - offsets[f])
+    index = np.int32 if len(buf) < 2**30 else np.int64
+    source = np.repeat((starts - offsets).astype(index), sizes)
+    source += np.arange(total, dtype=index)
+    np.minimum(source, len(buf) - 1, out=source)
+    out = buf[source]
+    out[offsets + lengths] = _NL
+    return out.tobytes()
+
+
+def line_bounds(buf):
+    """Return ``(starts, ends)`` of the lines in ``buf``.
+
+    Lines end at "\\r\\n", "\\r" or "\\n" like Python's universal newlines
+    (what the original ``for line in f`` loop saw); a final line without a
+    terminator is included.
+    """
+    size = len(buf)
+    is_nl = buf == _NL
+    is_cr = buf == _CR
+    crlf = is_cr[:-1] & is_nl[1:]
+    terminator = is_nl | is_cr
+    terminator[1:] &= ~crlf  # the '\\n' of "\\r\\n" ends nothing by itself
+
+    ends = np.flatnonzero(terminator)
+    step = np.ones(ends.size, dtype=np.int64)
+    if ends.size:
+        inside = ends < size - 1
+        step[inside] += crlf[ends[inside]]
+    next_starts = ends + step
+    if not ends.size or next_starts[-1] < size:
+        ends = np.append(ends, size)
+        next_starts = np.append(next_starts, size)
+    starts = np.concatenate(([0], next_starts[:-1]))
+    return starts, ends
+
+
+def parse_range(buf, indexes, encoding):
+    """Parse the lines in ``buf`` into ``{index: [str, ...]}``.
+
+    Same field semantics as :func:`~column_finder.readers.split_txt_line`:
+    split on every ';', short lines padded with "".
+    """
+    size = len(buf)
+    if not size:
+        return {k: [] for k in set(indexes)}
+    starts, line_ends = line_bounds(buf)
+
+    # Sentinel separator so lookups past the last one stay in bounds
+    seps = np.append(np.flatnonzero(buf == _SEP), size)
+    first = np.searchsorted(seps, starts)
+    count = np.searchsorted(seps, line_ends) - first
+
+    fields = {}
+    for k in set(indexes):
+        present = count >= k
+        if k == 0:
+            field_starts = starts
+        else:
+            field_starts = np.where(
+                present, seps[np.minimum(first + k - 1, seps.size - 1)] + 1,
+                line_ends
+            )
+        field_ends = np.where(
+            count > k, seps[np.minimum(first + k, seps.size - 1)], line_ends
+        )
+        data = _gather(buf, field_starts, field_ends)
+        fields[k] = data.decode(encoding, errors="replace").split("\n")[:-1]
+    return fields
+
+
+def _frame(fields, indexes, columns):
+    df = pd.DataFrame(fields, dtype=str)
+    if df.empty:
+        df = pd.DataFrame(columns=sorted(fields), dtype=str)
+    df = df[indexes]
+    df.columns = columns
+    return df
+
+
+def _read_range(path, start, end, indexes, encoding, columns):
+    # Runs in pool workers: map the file again instead of pickling bytes
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        buf = np.frombuffer(mm, dtype=np.uint8, count=end - start, offset=start)
+        try:
+            return _frame(parse_range(buf, indexes, encoding), indexes, columns)
+        finally:
+            del buf  # release the export before the map is closed
+
+
+def read_txt_mmap_chunks(path, options, encoding, workers=1):
+    """Yield one frame per newline-aligned byte range of a TXT / TXT4 file.
+
+    ``encoding`` must be a concrete codec; with ``workers > 1`` the ranges
+    are parsed in a process pool, at most two per worker ahead of the
+    consumer, and yielded in file order.
+    """
+    indexes = list(options.txt_column_indexes)
+    columns = list(options.columns)
+    with open(path, "rb") as f:
+        head = f.read(len(codecs.BOM_UTF8))
+        f.seek(0, 2)
+        size = f.tell()
+        if not size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            ranges = byte_ranges(mm, size, RANGE_BYTES)
+
+    # A UTF-8 BOM is not part of the first code (as with utf-8-sig)
+    if head == codecs.BOM_UTF8 and encoding.lower().replace("_", "-").startswith("utf-8"):
+        ranges[0] = (len(codecs.BOM_UTF8), ranges[0][1])
+
+    jobs = [(path, start, end, indexes, encoding, columns) for start, end in ranges]
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield _read_range(*job)
+        return
+
+    workers = min(workers, len(jobs))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        try:
+            yield from bounded_map(pool, _read_range, jobs, 2 * workers)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,87 @@
+from dataclasses import dataclass, field
+
+from .config import (
+    AUTO_ENCODING,
+    CHUNK_ROWS,
+    COLUMN_ALIASES,
+    INGEST_CACHE_MB,
+    OUTPUT_CSV_ENCODING,
+    OUTPUT_FORMATS,
+    TARGET_COLUMNS,
+    TXT_COLUMN_INDEXES,
+)
+
+
+@dataclass
+class MergeOptions:
+    """Settings shared by every front-end of the merge engine.
+
+    ``mapping`` is ``"fuzzy"`` (case-insensitive substring match of CSV
+    headers, missing columns filled with "") or ``"strict"`` (headers must
+    match ``columns`` exactly). ``aliases`` lists other headers accepted
+    for a target column in both modes, e.g. "CenaBrutto" for "Cena".
+    """
+
+    columns: list = field(default_factory=lambda: list(TARGET_COLUMNS))
+    txt_column_indexes: list = field(
+        default_factory=lambda: list(TXT_COLUMN_INDEXES)
+    )
+    mapping: str = "fuzzy"
+    aliases: dict = field(
+        default_factory=lambda: {k: list(v) for k, v in COLUMN_ALIASES.items()}
+    )
+    dedupe: bool = True
+    # Experimental: keep repeated text columns (config.DICTIONARY_COLUMNS) as
+    # categoricals and, with pyarrow, codes as string[pyarrow] while merging:
+    # less memory, somewhat slower; outputs are unchanged (see compact.py)
+    compact: bool = False
+    include_target: bool = True
+    outputs: tuple = OUTPUT_FORMATS
+    # Input codecs; "auto" detects utf-8-sig / utf-8 / cp1250 per file
+    csv_encoding: str = AUTO_ENCODING
+    txt_encoding: str = AUTO_ENCODING
+    output_csv_encoding: str = OUTPUT_CSV_ENCODING
+    # XLSX backend: "auto" (streaming xlsxwriter / openpyxl write-only),
+    # "openpyxl", "xlsxwriter" or "pandas" (in-memory to_excel)
+    xlsx_writer: str = "auto"
+    # Rows parsed per batch from CSV / TXT inputs; 0 or None reads each
+    # file in one go
+    chunksize: int = CHUNK_ROWS
+    # TXT / TXT4 parser: "pandas" (C parser) or "mmap" (numpy offsets over
+    # a memory-mapped file, decoding only the selected fields); the mmap
+    # reader can parse newline-aligned byte ranges in parallel processes
+    txt_reader: str = "pandas"
+    txt_range_workers: int = 1
+    # XLSM / XLSX parser: "auto" (calamine if installed, else "openpyxl"
+    # read-only streaming of the mapped columns), "calamine" or "pandas"
+    # (``pd.read_excel`` of the whole sheet)
+    excel_reader: str = "auto"
+    # JSON file caching resolved CSV column mappings per header line
+    # (None disables the cache, see header_cache.py)
+    header_cache: str = None
+    # Folder caching the extracted rows of every input by content (None
+    # disables it, see ingest_cache.py); least recently used entries are
+    # evicted above ``ingest_cache_mb``
+    ingest_cache: str = None
+    ingest_cache_mb: int = INGEST_CACHE_MB
+    # Parallel ingest: number of workers and "process" or "thread" pool
+    workers: int = 1
+    executor: str = "process"
+    # Keep deduplicated master data in a SQLite store next to the target
+    # and regenerate outputs only when it changed (see store.py)
+    incremental: bool = False
+    # Incremental mode only: append every change of config.HISTORY_COLUMNS
+    # per code (old and new values, source file, time) to the store's
+    # price history
+    history: bool = False
+    # Also write <target>.added/.changed/.removed.<delta> ("csv" or
+    # "parquet") with the rows that differ from the previous run (see
+    # delta.py); None writes full exports only
+    delta: str = None
+    # JSON-lines file receiving one record (timings, rows, bytes, peak RSS)
+    # per merge, see stats.py
+    run_log: str = None
+    # Profile the run with "cprofile" or "pyinstrument"; the report goes to
+    # ``profile_path`` (default: next to the target, .prof / .html)
+    profiler: str = None
+    profile_path: str = None
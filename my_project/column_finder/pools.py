@@ -0,0 +1,31 @@
+import itertools
+from collections import deque
+
+
+# ============================================================
+# BOUNDED POOL MAP
+# ============================================================
+#
+# ``pool.map`` and a list of ``pool.submit`` calls queue every job at
+# once: workers run ahead of the consumer and every finished result (a
+# whole parsed file) waits, pickled into the parent, until it is taken.
+# Submitting only a few jobs ahead keeps the workers busy while bounding
+# the memory held by results.
+
+def bounded_map(pool, func, jobs, in_flight):
+    """Yield ``func(*job)`` for every job in order, via ``pool``.
+
+    At most ``in_flight`` jobs are submitted but not yet consumed; the
+    next job is submitted as soon as a result is taken. Jobs not started
+    when the generator is closed stay queued in ``pool`` (shut it down with
+    ``cancel_futures=True`` to drop them).
+    """
+    jobs = iter(jobs)
+    pending = deque(
+        pool.submit(func, *job) for job in itertools.islice(jobs, max(1, in_flight))
+    )
+    while pending:
+        result = pending.popleft().result()
+        for job in itertools.islice(jobs, 1):
+            pending.append(pool.submit(func, *job))
+        yield result
@@ -0,0 +1,114 @@
+import itertools
+import os
+from functools import lru_cache
+
+import pandas as pd
+
+from .arrow_io import ARROW_KINDS, arrow_columns, iter_arrow_frames
+from .config import SEPARATOR
+from .encoding import resolve_encodings
+from .excel_reader import SheetReader
+from .options import MergeOptions
+from .readers import (
+    column_plan,
+    input_kind,
+    resolve_csv_columns,
+    split_txt_line,
+)
+
+
+# ============================================================
+# BOUNDED PREVIEW
+# ============================================================
+
+PREVIEW_ROWS = 5
+PREVIEW_CACHE_SIZE = 64
+
+
+def preview_lines(path, options=None, nrows=PREVIEW_ROWS, rename=True):
+    """Return text lines previewing the first ``nrows`` mapped rows of ``path``.
+
+    Only the header and ``nrows`` rows are read, so previewing a multi-GB
+    export costs the same as a small file. Results are kept in an LRU cache
+    keyed by path, size and mtime: re-selecting an unchanged file is free,
+    while an edited file is read again. CSV previews are a table (with the
+    source headers unless ``rename``); Parquet / Feather and XLSM / XLSX
+    previews are tables read from the first batch or rows only; TXT
+    previews are "; "-joined fields.
+    """
+    options = resolve_encodings(path, options or MergeOptions())
+    stat = os.stat(path)
+    return list(_cached_preview(
+        path,
+        (stat.st_size, stat.st_mtime_ns),
+        nrows,
+        rename,
+        tuple(options.columns),
+        tuple(options.txt_column_indexes),
+        options.csv_encoding,
+        options.txt_encoding,
+        options.header_cache,
+    ))
+
+
+def clear_preview_cache():
+    _cached_preview.cache_clear()
+
+
+@lru_cache(maxsize=PREVIEW_CACHE_SIZE)
+def _cached_preview(path, stamp, nrows, rename, columns, txt_indexes,
+                    csv_encoding, txt_encoding, header_cache):
+    kind = input_kind(path)
+    if kind in ARROW_KINDS:
+        header = pd.Index(arrow_columns(path, kind))
+        mapped_cols, missing = column_plan(
+            header, path, MergeOptions(columns=list(columns))
+        )
+        read = [col for col in mapped_cols if col not in missing] or list(header[:1])
+        first = next(iter_arrow_frames(path, kind, read, nrows), None)
+        df = first.head(nrows) if first is not None else pd.DataFrame(columns=read)
+        return _table(df, mapped_cols, missing, rename)
+
+    if kind == "excel":
+        with SheetReader(path) as sheet:
+            if sheet.header is None:
+                return ()
+            mapped_cols, missing = column_plan(
+                sheet.header, path, MergeOptions(columns=list(columns))
+            )
+            read = [col for col in mapped_cols if col not in missing]
+            df = sheet.read(read or list(sheet.header[:1]), nrows=nrows)
+        return _table(df, mapped_cols, missing, rename)
+
+    if kind == "csv":
+        options = MergeOptions(
+            columns=list(columns),
+            csv_encoding=csv_encoding,
+            header_cache=header_cache
+        )
+        mapped_cols, missing, usecols = resolve_csv_columns(path, options)
+        df = pd.read_csv(
+            path,
+            sep=SEPARATOR,
+            encoding=csv_encoding,
+            dtype=str,
+            keep_default_na=False,
+            usecols=usecols or [0],
+            nrows=nrows
+        )
+        return _table(df, mapped_cols, missing, rename)
+
+    with open(path, "r", encoding=txt_encoding, errors="replace") as f:
+        return tuple(
+            "; ".join(split_txt_line(line, txt_indexes))
+            for line in itertools.islice(f, nrows)
+        )
+
+
+def _table(df, mapped_cols, missing, rename):
+    for col in missing:
+        df[col] = ""
+    df = df[list(mapped_cols)]
+    if rename:
+        df = df.rename(columns=mapped_cols)
+    return tuple(df.to_string(index=False).split("\n"))
@@ -0,0 +1,461 @@
+import csv
+import functools
+import itertools
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .arrow_io import arrow_columns, iter_arrow_frames
+from .config import SEPARATOR
+from .encoding import resolve_encodings
+from .excel_reader import SheetReader
+from .errors import MergeError, MissingColumnsError
+from .header_cache import get_cache, header_signature
+from .mmap_reader import read_txt_mmap_chunks
+
+
+# ============================================================
+# INPUT TYPE DETECTION
+# ============================================================
+
+EXCEL_EXTENSIONS = (".xlsm", ".xlsx")
+PARQUET_EXTENSIONS = (".parquet",)
+FEATHER_EXTENSIONS = (".feather", ".arrow")
+
+
+def input_kind(path):
+    """Return "csv", "excel", "parquet", "feather" or "txt".
+
+    Anything with an unknown extension is read as TXT.
+    """
+    lowered = path.lower()
+    if lowered.endswith(".csv"):
+        return "csv"
+    if lowered.endswith(EXCEL_EXTENSIONS):
+        return "excel"
+    if lowered.endswith(PARQUET_EXTENSIONS):
+        return "parquet"
+    if lowered.endswith(FEATHER_EXTENSIONS):
+        return "feather"
+    return "txt"
+
+
+# ============================================================
+# COLUMN MAPPING
+# ============================================================
+
+def _header_name(column):
+    # Excel headers may be numbers (e.g. a 2024 cell) or padded with spaces
+    return str(column).strip()
+
+
+def fuzzy_column_mapping(columns, target_columns, aliases=None):
+    """Map source headers to target names by case-insensitive substring.
+
+    A header equal to one of the ``aliases`` of a target (e.g. "CenaBrutto"
+    for "Cena") is taken before any substring match. Returns
+    ``(mapped_cols, missing)`` where ``mapped_cols`` maps source column ->
+    target column and ``missing`` lists targets without a match (those map
+    to themselves and are filled with ""). Headers are compared as
+    stripped text, so numeric Excel header cells are matched too.
+    """
+    aliases = aliases or {}
+    mapped_cols = {}
+    missing = []
+    lowered = [(c, _header_name(c).lower()) for c in columns]
+    for col in target_columns:
+        names = {alias.lower() for alias in aliases.get(col, ())}
+        match = [c for c, name in lowered if name in names]
+        match = match or [c for c, name in lowered if col.lower() in name]
+        if match:
+            mapped_cols[match[0]] = col
+        else:
+            missing.append(col)
+            mapped_cols[col] = col
+    return mapped_cols, missing
+
+
+def strict_column_mapping(columns, target_columns, aliases=None):
+    """Map headers equal to a target name (or one of its ``aliases``).
+
+    Returns ``(mapped_cols, missing)`` like :func:`fuzzy_column_mapping`.
+    """
+    aliases = aliases or {}
+    mapped_cols = {}
+    missing = []
+    for col in target_columns:
+        match = [
+            c for name in [col, *aliases.get(col, ())]
+            for c in columns if _header_name(c) == name
+        ]
+        if match:
+            mapped_cols[match[0]] = col
+        else:
+            missing.append(col)
+            mapped_cols[col] = col
+    return mapped_cols, missing
+
+
+_mapping_clock = threading.local()
+
+
+def _timed_mapping(func):
+    """Add the time spent in ``func`` to this thread's mapping clock."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if getattr(_mapping_clock, "active", False):
+            return func(*args, **kwargs)  # already timed by the caller
+        _mapping_clock.active = True
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _mapping_clock.active = False
+            _mapping_clock.seconds = (
+                getattr(_mapping_clock, "seconds", 0.0)
+                + time.perf_counter() - started
+            )
+    return wrapper
+
+
+def take_mapping_seconds():
+    """Return and reset the column mapping time spent in this thread."""
+    seconds = getattr(_mapping_clock, "seconds", 0.0)
+    _mapping_clock.seconds = 0.0
+    return seconds
+
+
+@_timed_mapping
+def column_plan(header, path, options):
+    """Resolve ``(mapped_cols, missing)`` for a headered source.
+
+    Works on the header alone, so the mapping (and a strict-mode
+    :class:`MissingColumnsError`) is known before any data row is parsed.
+    """
+    if options.mapping == "strict":
+        mapped_cols, missing = strict_column_mapping(
+            header, options.columns, options.aliases
+        )
+        if missing:
+            raise MissingColumnsError(path, missing)
+        return mapped_cols, []
+
+    return fuzzy_column_mapping(header, options.columns, options.aliases)
+
+
+def apply_column_plan(df, mapped_cols, missing):
+    """Select and rename the mapped columns, filling ``missing`` with ""."""
+    for col in missing:
+        df[col] = ""
+    return df[list(mapped_cols)].rename(columns=mapped_cols)
+
+
+def select_columns(df, path, options):
+    """Select and rename the mapped columns of a headered frame."""
+    return apply_column_plan(df, *column_plan(df.columns, path, options))
+
+
+# ============================================================
+# READERS
+# ============================================================
+#
+# Every reader is a generator of frames with ``options.columns``. CSV and
+# TXT inputs are parsed in batches of ``options.chunksize`` rows, so peak
+# memory depends on the batch size and the selected columns only, never on
+# the size of the file.
+
+def _chunked(reader):
+    """Yield the chunks of a ``read_csv`` call made with or without chunksize."""
+    if isinstance(reader, pd.DataFrame):
+        yield reader
+        return
+    with reader:
+        yield from reader
+
+
+def _csv_kwargs(options):
+    return dict(
+        sep=SEPARATOR,
+        encoding=options.csv_encoding,
+        dtype=str,
+        keep_default_na=False
+    )
+
+
+def _header_line(path):
+    with open(path, "rb") as f:
+        return f.readline()
+
+
+@_timed_mapping
+def resolve_csv_columns(path, options):
+    """Return ``(mapped_cols, missing, usecols)`` for a CSV file.
+
+    ``options`` must carry a concrete ``csv_encoding`` (see
+    :func:`~column_finder.encoding.resolve_encodings`). Only the header is
+    read. ``usecols`` are the source positions of the
+    mapped columns (positions rather than names, as duplicated headers come
+    back mangled). With ``options.header_cache`` the result is looked up by
+    a hash of the raw header line first, so files sharing a supplier
+    layout are resolved once.
+    """
+    cache = signature = None
+    if options.header_cache:
+        line = _header_line(path)
+        # A quoted header may continue on the next line: not cacheable
+        if line and b'"' not in line:
+            cache = get_cache(options.header_cache)
+            signature = header_signature(line, options)
+            cached = cache.get(signature)
+            if cached is not None:
+                return cached
+
+    header = pd.read_csv(path, nrows=0, **_csv_kwargs(options)).columns
+    mapped_cols, missing = column_plan(header, path, options)
+    usecols = [header.get_loc(col) for col in mapped_cols if col not in missing]
+    if cache is not None:
+        cache.put(signature, mapped_cols, missing, usecols)
+    return mapped_cols, missing, usecols
+
+
+def read_csv_chunks(path, options):
+    """Stream a ';'-separated CSV with a header row.
+
+    The column mapping is resolved from the header first; the body is then
+    parsed with ``usecols`` limited to the mapped columns.
+    """
+    options = resolve_encodings(path, options)
+    mapped_cols, missing, usecols = resolve_csv_columns(path, options)
+    reader = pd.read_csv(
+        path,
+        usecols=usecols or [0],  # keep the row count when nothing matched
+        chunksize=options.chunksize or None,
+        **_csv_kwargs(options)
+    )
+    for chunk in _chunked(reader):
+        yield apply_column_plan(chunk, mapped_cols, missing)
+
+
+def read_csv(path, options):
+    """Read a ';'-separated CSV with a header row."""
+    return _concat(read_csv_chunks(path, options), options)
+
+
+def split_txt_line(line, indexes):
+    """Split one headerless TXT line and pick ``indexes`` (short lines padded)."""
+    parts = line.rstrip("\n").split(SEPARATOR)
+    while len(parts) < max(indexes) + 1:
+        parts.append("")
+    return [parts[i] for i in indexes]
+
+
+def read_txt_lines(path, options):
+    """Read a headerless TXT file line by line in Python.
+
+    Reference implementation of the TXT semantics that :func:`read_txt`
+    reproduces with the C parser (kept for benchmarks and comparisons).
+    """
+    options = resolve_encodings(path, options)
+    return _concat(_txt_line_chunks(path, options), options)
+
+
+def _txt_line_chunks(path, options, chunksize=0, skip=0):
+    """Yield frames of ``chunksize`` TXT lines split in Python (0: one frame).
+
+    The first ``skip`` lines are left out.
+    """
+    rows = []
+    with open(path, "r", encoding=options.txt_encoding, errors="replace") as f:
+        for line in itertools.islice(f, skip, None):
+            rows.append(split_txt_line(line, options.txt_column_indexes))
+            if len(rows) == chunksize:
+                yield pd.DataFrame(rows, columns=options.columns)
+                rows = []
+    if rows:
+        yield pd.DataFrame(rows, columns=options.columns)
+
+
+TXT_SCAN_BYTES = 1 << 24
+
+
+def max_field_count(path, block_size=TXT_SCAN_BYTES):
+    """Return the largest number of ';'-separated fields on any line.
+
+    Scans the raw bytes with numpy (';', '\\r' and '\\n' are single bytes
+    in every supported encoding), without decoding or splitting lines.
+    Lines end at '\\n', '\\r' or '\\r\\n' as in :func:`read_txt_lines`; the
+    '\\n' of '\\r\\n' only ends an empty line, which cannot be the widest.
+    """
+    sep, newline, cr = ord(SEPARATOR), ord("\n"), ord("\r")
+    widest = 0
+    carry = 0  # separators of the line continuing into the next block
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            data = np.frombuffer(block, dtype=np.uint8)
+            seps = np.flatnonzero(data == sep)
+            ends = np.flatnonzero((data == newline) | (data == cr))
+            if not ends.size:
+                carry += seps.size
+                continue
+            before = np.searchsorted(seps, ends)
+            per_line = np.diff(before, prepend=0)
+            per_line[0] += carry
+            widest = max(widest, int(per_line.max()))
+            carry = seps.size - int(before[-1])
+    return max(widest, carry) + 1
+
+
+def read_txt_chunks(path, options):
+    """Stream a headerless ';'-separated TXT / TXT4 file with the C parser.
+
+    Fields are split on every ';' (no quoting), short lines are padded with
+    "" and extra fields are ignored, like :func:`split_txt_line`. Only the
+    fields in ``options.txt_column_indexes`` are kept from each chunk.
+    ``options.txt_reader = "mmap"`` switches to the memory-mapped reader
+    (see mmap_reader.py), which yields one frame per byte range instead.
+    """
+    options = resolve_encodings(path, options)
+    if options.txt_reader == "mmap":
+        yield from read_txt_mmap_chunks(
+            path, options, options.txt_encoding, options.txt_range_workers
+        )
+        return
+    if options.txt_reader != "pandas":
+        raise ValueError(f"Unknown TXT reader: {options.txt_reader}")
+
+    indexes = options.txt_column_indexes
+    # The C parser rejects lines longer than ``names`` and validates
+    # ``usecols`` per internal block, so name every field the widest line
+    # has and select afterwards
+    width = max(max(indexes) + 1, max_field_count(path))
+    rows = 0
+    try:
+        reader = pd.read_csv(
+            path,
+            sep=SEPARATOR,
+            header=None,
+            names=range(width),
+            index_col=False,
+            dtype=str,
+            na_filter=False,
+            quoting=csv.QUOTE_NONE,
+            skip_blank_lines=False,
+            encoding=options.txt_encoding,
+            encoding_errors="replace",
+            engine="c",
+            chunksize=options.chunksize or None
+        )
+        for chunk in _chunked(reader):
+            chunk = chunk[indexes]
+            chunk.columns = options.columns
+            rows += len(chunk)
+            yield chunk
+    except pd.errors.ParserError:
+        # The C tokenizer gives up on some runs of bare '\r' next to a
+        # quote; the rest of the file is split line by line instead
+        yield from _txt_line_chunks(path, options, options.chunksize, skip=rows)
+
+
+def read_txt(path, options):
+    """Read a headerless ';'-separated TXT / TXT4 file with the C parser."""
+    return _concat(read_txt_chunks(path, options), options)
+
+
+def read_excel_chunks(path, options):
+    """Read the first sheet of an XLSM / XLSX workbook (a single chunk).
+
+    The header row is located first and only the mapped columns are
+    converted (see :class:`~column_finder.excel_reader.SheetReader`);
+    ``options.excel_reader == "pandas"`` loads the whole sheet with
+    ``pd.read_excel`` instead.
+    """
+    if options.excel_reader == "pandas":
+        df = pd.read_excel(path, engine="openpyxl")
+        yield select_columns(df, path, options)
+        return
+
+    with SheetReader(path, options.excel_reader) as sheet:
+        if sheet.header is None:
+            yield select_columns(pd.DataFrame(), path, options)
+            return
+        mapped_cols, missing = column_plan(sheet.header, path, options)
+        # Nothing mapped: still read one column to keep the row count
+        columns = [col for col in mapped_cols if col not in missing]
+        df = sheet.read(columns or list(sheet.header[:1]))
+    yield apply_column_plan(df, mapped_cols, missing)
+
+
+def read_excel(path, options):
+    """Read the first sheet of an XLSM / XLSX workbook."""
+    return _concat(read_excel_chunks(path, options), options)
+
+
+def read_arrow_chunks(path, options):
+    """Read a Parquet or Feather (Arrow IPC) file in batches.
+
+    The header comes from the file schema, so only the mapped columns are
+    read; Parquet is streamed in ``options.chunksize`` rows and Feather
+    record batches are read from a memory map. Needs pyarrow.
+    """
+    kind = input_kind(path)
+    header = pd.Index(arrow_columns(path, kind))
+    mapped_cols, missing = column_plan(header, path, options)
+    # Nothing mapped: still read one column to keep the row count
+    columns = [col for col in mapped_cols if col not in missing] or list(header[:1])
+    for chunk in iter_arrow_frames(path, kind, columns, options.chunksize):
+        yield apply_column_plan(chunk, mapped_cols, missing)
+
+
+def read_arrow(path, options):
+    """Read a Parquet or Feather (Arrow IPC) file."""
+    return _concat(read_arrow_chunks(path, options), options)
+
+
+def _concat(chunks, options):
+    frames = list(chunks)
+    if not frames:
+        return pd.DataFrame(columns=options.columns)
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True)
+
+
+READERS = {
+    "csv": read_csv_chunks,
+    "txt": read_txt_chunks,
+    "excel": read_excel_chunks,
+    "parquet": read_arrow_chunks,
+    "feather": read_arrow_chunks,
+}
+
+
+def read_input_chunks(path, options):
+    """Yield frames with ``options.columns`` for one input file.
+
+    Any parsing failure is re-raised as :class:`MergeError` so callers can
+    report the offending file without knowing the reader internals.
+    """
+    try:
+        yield from READERS[input_kind(path)](path, options)
+    except MergeError:
+        raise
+    except Exception as e:
+        raise MergeError(path, e) from e
+
+
+def read_input(path, options):
+    """Read one input file into a single frame with ``options.columns``."""
+    return _concat(read_input_chunks(path, options), options)
+
+
+def read_target(path):
+    """Load an existing target workbook, or ``None`` when it does not exist."""
+    if not os.path.exists(path):
+        return None
+    return pd.read_excel(path, engine="openpyxl")
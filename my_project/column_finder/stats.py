@@ -0,0 +1,259 @@
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+
+# ============================================================
+# RUN STATISTICS
+# ============================================================
+
+def peak_rss():
+    """Peak resident set size of this process in bytes (None if unknown)."""
+    try:
+        import resource
+    except ImportError:  # Windows: psutil reports the peak working set
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def current_rss():
+    """Resident set size of this process now, in bytes (None if unknown)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+RSS_SAMPLE_SECONDS = 0.05
+
+
+class RunPeakRss:
+    """Peak RSS of this process while the ``with`` block runs (``peak``).
+
+    :func:`peak_rss` is the peak of the whole process lifetime, so in the
+    GUI every merge after the largest one would report that old peak. If
+    the block raises the lifetime peak, the new peak is exact; otherwise
+    the highest RSS sampled every ``RSS_SAMPLE_SECONDS`` is used (a spike
+    shorter than that can be missed). ``None`` if RSS is unknown.
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self.peak = None
+        self.sampled = None
+        self.stop = threading.Event()
+
+    def __enter__(self):
+        self.started_peak = peak_rss()
+        self._sample()
+        self.thread = threading.Thread(
+            target=self._run, name="rss-sampler", daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        self.thread.join()
+        self._sample()
+        ended = peak_rss()
+        if None not in (self.started_peak, ended) and ended > self.started_peak:
+            self.peak = ended
+        else:
+            self.peak = self.sampled
+
+    def _run(self):
+        while not self.stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        rss = current_rss()
+        if rss is not None and (self.sampled is None or rss > self.sampled):
+            self.sampled = rss
+
+
+def _mb(size):
+    return None if size is None else round(size / 2**20, 1)
+
+
+def run_stats(result):
+    """JSON-ready statistics of a :class:`~column_finder.engine.MergeResult`.
+
+    ``stages`` are wall-clock seconds of the parts of the run that do not
+    overlap: "target" (loading the existing target), "read" (reading
+    inputs), "concat" or "dedupe" (collecting rows, also while files are
+    read), "store" (incremental upsert) and "write" (all outputs). Per file
+    ``parse_seconds`` and ``mapping_seconds`` are measured in the worker
+    that read it. ``peak_rss_mb`` is the peak of the merging process
+    during this run (see :class:`RunPeakRss`); process pool workers are
+    not included. ``delta`` counts the rows of
+    each delta file ("delta" stage).
+    """
+    return {
+        "rows": result.rows,
+        "seconds": None if result.seconds is None else round(result.seconds, 6),
+        "peak_rss_mb": _mb(result.peak_rss),
+        "stages": {name: round(s, 6) for name, s in result.stages.items()},
+        "files": [
+            {
+                "file": t.file,
+                "worker": t.worker,
+                "bytes": t.bytes,
+                "rows": t.rows,
+                "parse_seconds": round(t.seconds, 6),
+                "mapping_seconds": round(t.mapping_seconds, 6),
+            }
+            for t in result.timings
+        ],
+        "outputs": [
+            {"format": t.format, "path": t.path, "seconds": round(t.seconds, 6)}
+            for t in result.output_timings
+        ],
+        "delta": {kind: rows for kind, (_, rows) in result.delta.items()},
+    }
+
+
+def format_stats(result):
+    """Human-readable summary lines of a merge result."""
+    stats = run_stats(result)
+    files = stats["files"]
+    lines = []
+    if stats["seconds"] is not None:
+        lines.append(
+            f"Total {stats['seconds']:.2f} s, {stats['rows']:,} rows, "
+            f"peak RSS {stats['peak_rss_mb']} MB during the run"
+        )
+    if files:
+        size = sum(f["bytes"] for f in files)
+        lines.append(
+            f"Read {len(files)} file(s), {sum(f['rows'] for f in files):,} rows, "
+            f"{size / 2**20:.1f} MB: parse "
+            f"{sum(f['parse_seconds'] for f in files):.2f} s, mapping "
+            f"{sum(f['mapping_seconds'] for f in files):.3f} s"
+        )
+    if stats["stages"]:
+        lines.append("Stages: " + ", ".join(
+            f"{name} {seconds:.2f} s" for name, seconds in stats["stages"].items()
+        ))
+    if stats["outputs"]:
+        lines.append("Outputs: " + ", ".join(
+            f"{o['format']} {o['seconds']:.2f} s" for o in stats["outputs"]
+        ))
+    if stats["delta"]:
+        lines.append("Delta: " + ", ".join(
+            f"{rows:,} {kind}" for kind, rows in stats["delta"].items()
+        ))
+    for f in sorted(files, key=lambda f: f["parse_seconds"], reverse=True)[:5]:
+        lines.append(
+            f"  {os.path.basename(f['file'])}: {f['rows']:,} rows, "
+            f"{f['parse_seconds']:.2f} s"
+        )
+    return lines
+
+
+# ============================================================
+# RUN LOG (JSON LINES)
+# ============================================================
+
+def append_run_log(path, record):
+    """Append ``record`` as one JSON line to the run log at ``path``."""
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+
+def run_record(files, target, options, status, seconds, result=None, error=None,
+               peak=None):
+    """Run log entry of one merge (``status`` "ok", "cancelled" or "error").
+
+    ``peak`` is the peak RSS of a run that has no ``result``.
+    """
+    record = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "status": status,
+        "target": target,
+        "inputs": len(files),
+        "outputs_requested": list(options.outputs),
+        "incremental": options.incremental,
+        "workers": options.workers,
+        "seconds": round(seconds, 6),
+    }
+    if result is not None:
+        record.update(run_stats(result))
+    else:
+        record["peak_rss_mb"] = _mb(peak)
+    if error is not None:
+        record["error"] = str(error)
+    return record
+
+
+# ============================================================
+# PROFILING HOOK
+# ============================================================
+
+PROFILERS = ("cprofile", "pyinstrument")
+
+
+def profile_path(profiler, target=None, path=None):
+    """Default profile file: next to ``target`` (.prof or .html)."""
+    if path:
+        return path
+    stem = os.path.splitext(target)[0] if target else "column_finder"
+    return stem + (".html" if profiler == "pyinstrument" else ".prof")
+
+
+@contextlib.contextmanager
+def profiled(profiler, path):
+    """Profile the block with cProfile or pyinstrument (``None``: no-op).
+
+    cProfile stats are dumped to ``path`` (open with ``pstats`` or
+    snakeviz); pyinstrument writes an HTML report. Only the calling thread
+    is profiled: use ``workers=1`` to see the parsing itself.
+    """
+    if profiler is None:
+        yield
+        return
+    if profiler == "cprofile":
+        import cProfile
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            profile.dump_stats(path)
+        return
+    if profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise ValueError(
+                "The pyinstrument profiler needs the pyinstrument package "
+                "(pip install pyinstrument)"
+            ) from None
+        profile = Profiler()
+        profile.start()
+        try:
+            yield
+        finally:
+            profile.stop()
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profile.output_html())
+        return
+    raise ValueError(f"Unknown profiler: {profiler}")
@@ -0,0 +1,312 @@
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from .config import HISTORY_COLUMNS, KEY_COLUMN
+
+
+# ============================================================
+# SIDECAR CATALOGUE STORE
+# ============================================================
+
+STORE_EXTENSION = ".sqlite"
+
+# Provenance kept per code next to the catalogue columns: the input file
+# that delivered the current values and when they were upserted (UTC ISO)
+SOURCE_COLUMN = "source"
+INGESTED_COLUMN = "ingested_at"
+
+
+def store_path(target):
+    """Return the sidecar store kept next to the target XLSX."""
+    return os.path.splitext(target)[0] + STORE_EXTENSION
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+class CatalogueStore:
+    """Deduplicated master data keyed on ``Kod`` in a SQLite file.
+
+    Every row carries a ``seq`` number; a row that is inserted or whose
+    values change gets the next number, so ``ORDER BY seq DESC`` gives the
+    "newest entry on top" order of the exports. Re-delivered rows with
+    identical values are left untouched, which is what lets a merge skip
+    regenerating unchanged exports. ``source`` and ``ingested_at`` record
+    where and when the current values of a code came from; they are not
+    part of the exports and do not count as a change.
+
+    The ``history`` table is an append-only log of the changes of the
+    ``tracked`` columns per code (see :meth:`record_changes`), indexed on
+    the code so :meth:`history` of one code does not scan the log.
+    """
+
+    def __init__(self, path, columns, key=KEY_COLUMN, tracked=HISTORY_COLUMNS):
+        if key not in columns:
+            raise ValueError(f"Key column {key!r} must be one of {columns}")
+        self.path = path
+        self.columns = list(columns)
+        self.key = key
+        self.tracked = [c for c in tracked if c in self.columns and c != key]
+        self.conn = sqlite3.connect(path)
+        self._create()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _create(self):
+        values = [c for c in self.columns if c != self.key]
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS catalogue ("
+            f"{_quote(self.key)} TEXT PRIMARY KEY, seq INTEGER NOT NULL"
+            + "".join(f", {_quote(c)} TEXT" for c in values)
+            + ")"
+        )
+        existing = {
+            row[1] for row in self.conn.execute("PRAGMA table_info(catalogue)")
+        }
+        # Stores created before provenance was tracked gain empty columns
+        for col in values + [SOURCE_COLUMN, INGESTED_COLUMN]:
+            if col not in existing:
+                self.conn.execute(
+                    f"ALTER TABLE catalogue ADD COLUMN {_quote(col)} TEXT"
+                )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS catalogue_seq ON catalogue(seq)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self._create_history()
+        self.conn.commit()
+
+    def _create_history(self):
+        changes = _history_columns(self.tracked)
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS history ("
+            f"id INTEGER PRIMARY KEY, {_quote(self.key)} TEXT NOT NULL"
+            + "".join(f", {_quote(c)} TEXT" for c in changes)
+            + f", {SOURCE_COLUMN} TEXT, recorded_at TEXT)"
+        )
+        existing = {
+            row[1] for row in self.conn.execute("PRAGMA table_info(history)")
+        }
+        for col in changes:
+            if col not in existing:
+                self.conn.execute(
+                    f"ALTER TABLE history ADD COLUMN {_quote(col)} TEXT"
+                )
+        self.conn.execute(
+            f"CREATE INDEX IF NOT EXISTS history_key "
+            f"ON history({_quote(self.key)}, id)"
+        )
+
+    # --------------------------------------------------------
+    # metadata
+    # --------------------------------------------------------
+
+    def _meta(self, key, default=0):
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return int(row[0]) if row else default
+
+    def _set_meta(self, key, value):
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, str(value))
+        )
+
+    @property
+    def version(self):
+        """Counter bumped by every committed upsert that changed rows."""
+        return self._meta("version")
+
+    def stale(self, fmt):
+        """True when the ``fmt`` export is older than the stored content."""
+        return self._meta(f"exported_version:{fmt}", -1) != self.version
+
+    def mark_exported(self, fmt):
+        self._set_meta(f"exported_version:{fmt}", self.version)
+        self.conn.commit()
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM catalogue").fetchone()[0]
+
+    # --------------------------------------------------------
+    # data
+    # --------------------------------------------------------
+
+    def upsert(self, df, source=None):
+        """Insert or update ``df`` rows in order (later rows win).
+
+        Provenance comes from a ``source`` column of ``df`` (file per row)
+        or else the ``source`` argument; every row of the call shares one
+        ingest timestamp. All rows go through a single ``executemany`` of
+        ``INSERT ... ON CONFLICT DO UPDATE`` inside the current transaction;
+        call :meth:`commit` (or :meth:`rollback`) afterwards. Returns the
+        number of rows that were inserted or changed.
+        """
+        if df.empty:
+            return 0
+
+        values = [c for c in self.columns if c != self.key]
+        names = [self.key, "seq"] + values + [SOURCE_COLUMN, INGESTED_COLUMN]
+        changed_if = " OR ".join(
+            f"catalogue.{_quote(c)} IS NOT excluded.{_quote(c)}" for c in values
+        ) or "0"
+        sql = (
+            f"INSERT INTO catalogue ({', '.join(map(_quote, names))}) "
+            f"VALUES ({', '.join('?' * len(names))}) "
+            f"ON CONFLICT({_quote(self.key)}) DO UPDATE SET "
+            + ", ".join(f"{_quote(c)} = excluded.{_quote(c)}" for c in names[1:])
+            + f" WHERE {changed_if}"
+        )
+
+        start = self._next_seq()
+        ingested = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        frame = df.reindex(columns=[self.key] + values).astype(object)
+        frame = frame.where(frame.notna(), None)
+        sources = [source] * len(df)
+        if SOURCE_COLUMN in df.columns:
+            sources = df[SOURCE_COLUMN].astype(object)
+            sources = sources.where(sources.notna(), source)
+        rows = (
+            (_text(row[0]) or "", start + i, *map(_text, row[1:]),
+             _text(src), ingested)
+            for i, (row, src) in enumerate(
+                zip(frame.itertuples(index=False, name=None), sources)
+            )
+        )
+
+        before = self.conn.total_changes
+        self.conn.executemany(sql, rows)
+        return self.conn.total_changes - before
+
+    def record_changes(self, df, source=None):
+        """Append the changes of the tracked columns in ``df`` to the history.
+
+        ``df`` holds rows in arrival order (oldest first), several per code
+        allowed. A row is recorded when its tracked values differ from the
+        previous row of its code, or, for the first row, from the stored
+        catalogue values (a new code is recorded with empty old values).
+        Call it before :meth:`upsert` of the same rows, in the same
+        transaction. Provenance works as in :meth:`upsert`. Returns the
+        number of recorded changes.
+        """
+        if df is None or df.empty or not self.tracked:
+            return 0
+
+        key = _quote(self.key)
+        new = [_quote("new_" + c) for c in self.tracked]
+        self.conn.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS arrivals (pos INTEGER PRIMARY KEY, "
+            f"{key} TEXT, {', '.join(f'{n} TEXT' for n in new)}, "
+            f"{SOURCE_COLUMN} TEXT)"
+        )
+        self.conn.execute("DELETE FROM arrivals")
+        frame = df.reindex(columns=[self.key] + self.tracked).astype(object)
+        frame = frame.where(frame.notna(), None)
+        sources = [source] * len(df)
+        if SOURCE_COLUMN in df.columns:
+            sources = df[SOURCE_COLUMN].astype(object)
+            sources = sources.where(sources.notna(), source)
+        self.conn.executemany(
+            f"INSERT INTO arrivals VALUES ({', '.join('?' * (len(new) + 3))})",
+            (
+                (i, _text(row[0]) or "", *map(_text, row[1:]), _text(src))
+                for i, (row, src) in enumerate(
+                    zip(frame.itertuples(index=False, name=None), sources)
+                )
+            )
+        )
+
+        # The old values of a row are those of the previous arrival of its
+        # code, or the stored ones for its first arrival
+        window = f"OVER (PARTITION BY a.{key} ORDER BY a.pos)"
+        previous = ", ".join(
+            f"CASE WHEN ROW_NUMBER() {window} = 1 THEN c.{_quote(col)} "
+            f"ELSE LAG(a.{n}) {window} END AS {_quote('old_' + col)}"
+            for col, n in zip(self.tracked, new)
+        )
+        changed_if = " OR ".join(
+            f"{_quote('old_' + col)} IS NOT {n}" for col, n in zip(self.tracked, new)
+        )
+        names = [key] + list(map(_quote, _history_columns(self.tracked)))
+        recorded = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        before = self.conn.total_changes
+        self.conn.execute(
+            f"INSERT INTO history ({', '.join(names)}, {SOURCE_COLUMN}, recorded_at) "
+            f"SELECT {', '.join(names)}, {SOURCE_COLUMN}, ? FROM ("
+            f"SELECT a.pos, a.{key}, {', '.join(f'a.{n}' for n in new)}, "
+            f"a.{SOURCE_COLUMN}, {previous} "
+            f"FROM arrivals a LEFT JOIN catalogue c ON c.{key} = a.{key}"
+            f") WHERE {changed_if} ORDER BY pos",
+            (recorded,)
+        )
+        return self.conn.total_changes - before
+
+    def commit(self, changed=True):
+        if changed:
+            self._set_meta("version", self.version + 1)
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def _next_seq(self):
+        row = self.conn.execute("SELECT MAX(seq) FROM catalogue").fetchone()
+        return (row[0] or 0) + 1
+
+    def frame(self):
+        """Return the catalogue newest-first with ``self.columns``."""
+        sql = (
+            f"SELECT {', '.join(map(_quote, self.columns))} "
+            f"FROM catalogue ORDER BY seq DESC"
+        )
+        df = pd.read_sql_query(sql, self.conn, dtype=str)
+        return df.fillna("")
+
+    def lookup(self, kod):
+        """Return the stored row of ``kod`` as a dict, or ``None``.
+
+        A primary key lookup: no export is read. Besides the catalogue
+        columns the dict holds ``source`` and ``ingested_at``.
+        """
+        names = self.columns + [SOURCE_COLUMN, INGESTED_COLUMN]
+        row = self.conn.execute(
+            f"SELECT {', '.join(map(_quote, names))} FROM catalogue "
+            f"WHERE {_quote(self.key)} = ?",
+            (str(kod),)
+        ).fetchone()
+        return None if row is None else dict(zip(names, row))
+
+    def history(self, kod):
+        """Return the recorded changes of ``kod``, oldest first."""
+        sql = (
+            f"SELECT {_quote(self.key)}, "
+            + "".join(f"{_quote(c)}, " for c in _history_columns(self.tracked))
+            + f"{SOURCE_COLUMN}, recorded_at FROM history "
+            f"WHERE {_quote(self.key)} = ? ORDER BY id"
+        )
+        df = pd.read_sql_query(sql, self.conn, params=(str(kod),), dtype=str)
+        return df.fillna("")
+
+
+def _history_columns(tracked):
+    """History columns: old and new value of every tracked column."""
+    return [f"{prefix}_{c}" for c in tracked for prefix in ("old", "new")]
+
+
+def _text(value):
+    return None if value is None else str(value)
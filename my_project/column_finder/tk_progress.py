@@ -0,0 +1,148 @@
+"""Tkinter progress bar + cancel button driving a :class:`MergeWorker`,
+and a panel showing the statistics of the last merge.
+
+Kept out of ``column_finder/__init__.py`` so the engine stays importable on
+machines without Tk.
+"""
+
+import os
+import queue
+import tkinter as tk
+from tkinter import ttk
+
+from .stats import format_stats
+from .worker import MergeWorker
+
+
+DEFAULT_TEXTS = {
+    "cancel": "Cancel",
+    "read": "Reading",
+    "dedupe": "Removing duplicates",
+    "write": "Writing",
+    "cancelling": "Cancelling…",
+    "rows_per_second": "rows/s",
+    "eta": "ETA",
+}
+
+POLISH_TEXTS = {
+    "cancel": "Anuluj",
+    "read": "Wczytywanie",
+    "dedupe": "Usuwanie duplikatów",
+    "write": "Zapis",
+    "cancelling": "Anulowanie…",
+    "rows_per_second": "wierszy/s",
+    "eta": "pozostało",
+}
+
+
+class MergeProgressPanel(tk.Frame):
+    """Progress bar, status line and cancel button for background merges."""
+
+    POLL_MS = 100
+
+    def __init__(self, master, texts=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.texts = {**DEFAULT_TEXTS, **(texts or {})}
+        self.worker = None
+
+        self.bar = ttk.Progressbar(self, mode="determinate", maximum=100)
+        self.bar.grid(row=0, column=0, sticky="ew")
+
+        self.cancel_button = tk.Button(
+            self,
+            text=self.texts["cancel"],
+            command=self.cancel,
+            state=tk.DISABLED
+        )
+        self.cancel_button.grid(row=0, column=1, padx=(5, 0))
+
+        self.status = tk.Label(self, text="", anchor="w")
+        self.status.grid(row=1, column=0, columnspan=2, sticky="ew")
+
+        self.columnconfigure(0, weight=1)
+
+    @property
+    def running(self):
+        return self.worker is not None
+
+    def start(self, files, target, options, on_done, on_error,
+              on_cancelled=None):
+        """Start merging in a worker thread; callbacks run on the Tk thread."""
+        self.callbacks = {
+            "done": on_done,
+            "error": on_error,
+            "cancelled": on_cancelled,
+        }
+        self.bar.config(value=0)
+        self.status.config(text="")
+        self.cancel_button.config(state=tk.NORMAL)
+
+        self.worker = MergeWorker(files, target, options)
+        self.worker.start()
+        self.after(self.POLL_MS, self._poll)
+
+    def cancel(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.cancel_button.config(state=tk.DISABLED)
+            self.status.config(text=self.texts["cancelling"])
+
+    def _poll(self):
+        while True:
+            try:
+                kind, payload = self.worker.messages.get_nowait()
+            except queue.Empty:
+                self.after(self.POLL_MS, self._poll)
+                return
+
+            if kind == "progress":
+                self._show(payload)
+                continue
+
+            self.worker = None
+            self.cancel_button.config(state=tk.DISABLED)
+            self.status.config(text="")
+            self.bar.config(value=100 if kind == "done" else 0)
+
+            callback = self.callbacks[kind]
+            if kind == "cancelled":
+                if callback is not None:
+                    callback()
+            else:
+                callback(payload)
+            return
+
+    def _show(self, progress):
+        if self.worker is None or self.worker.cancel_event.is_set():
+            return
+
+        if progress.stage == "read":
+            self.bar.config(value=90 * progress.done / max(progress.total, 1))
+            text = (
+                f"{self.texts['read']} {progress.done}/{progress.total}"
+                f" · {os.path.basename(progress.file)}"
+                f" · {progress.rows_per_second:,.0f} {self.texts['rows_per_second']}"
+            )
+            if progress.eta is not None:
+                text += f" · {self.texts['eta']} {progress.eta:.0f} s"
+        else:
+            self.bar.config(value=95 if progress.stage == "write" else 90)
+            text = self.texts[progress.stage]
+            if progress.file:
+                text += f" {os.path.basename(progress.file)}"
+        self.status.config(text=text)
+
+
+class MergeStatsPanel(tk.LabelFrame):
+    """Read-only summary of the last merge (timings, rows, peak RSS)."""
+
+    def __init__(self, master, title="Statistics", height=5, **kwargs):
+        super().__init__(master, text=title, **kwargs)
+        self.text = tk.Text(self, height=height, state=tk.DISABLED)
+        self.text.pack(fill=tk.BOTH, expand=True)
+
+    def show(self, result):
+        self.text.config(state=tk.NORMAL)
+        self.text.delete(1.0, tk.END)
+        self.text.insert(tk.END, "\n".join(format_stats(result)))
+        self.text.config(state=tk.DISABLED)
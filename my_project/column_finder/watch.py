@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+from dataclasses import replace
+
+from .config import DELTA_FORMATS, OUTPUT_FORMAT_CHOICES
+from .delta import DELTA_KINDS, delta_path, state_path
+from .engine import merge_files
+from .errors import MergeError
+from .options import MergeOptions
+from .writers import output_path
+
+
+# ============================================================
+# DROP FOLDER POLLING
+# ============================================================
+
+WATCH_EXTENSIONS = (
+    ".csv", ".txt", ".txt4", ".xlsm", ".parquet", ".feather", ".arrow"
+)
+WATCH_INTERVAL = 1.0
+SETTLE_SECONDS = 2.0
+
+
+class DropFolder:
+    """Poll a folder for input files that have finished arriving.
+
+    A file is ready once its size and mtime stayed the same for ``settle``
+    seconds, so files still being copied or written by a supplier export
+    are not picked up half-way. Plain polling is used on purpose: it works
+    the same on local disks and network shares on every platform.
+    Paths in ``exclude`` (e.g. the merge's own outputs) are never reported.
+    """
+
+    def __init__(self, folder, extensions=WATCH_EXTENSIONS,
+                 settle=SETTLE_SECONDS, skip_existing=False, clock=time.monotonic,
+                 exclude=()):
+        self.folder = folder
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.exclude = {_normalized(path) for path in exclude}
+        self.settle = settle
+        self.clock = clock
+        self.pending = {}  # path -> (stamp, time the stamp was first seen)
+        self.done = {}     # path -> stamp that was merged (or failed)
+        if skip_existing:
+            self.done.update(self._scan())
+
+    def _scan(self):
+        stamps = {}
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                name = entry.name
+                # Skip hidden / lock files such as ".~lock" or "~$file"
+                if name.startswith((".", "~")):
+                    continue
+                if not name.lower().endswith(self.extensions):
+                    continue
+                if _normalized(entry.path) in self.exclude:
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # removed while scanning
+                stamps[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        return stamps
+
+    def poll(self):
+        """Return settled, not yet merged files, oldest first."""
+        now = self.clock()
+        stamps = self._scan()
+        ready = []
+        for path, stamp in stamps.items():
+            if self.done.get(path) == stamp:
+                continue
+            seen = self.pending.get(path)
+            if seen is None or seen[0] != stamp:
+                self.pending[path] = (stamp, now)
+            elif now - seen[1] >= self.settle:
+                ready.append((stamp[1], path))
+
+        for path in list(self.pending):
+            if path not in stamps:
+                del self.pending[path]
+        # Arrival order, so a newer delivery of a code wins
+        return [path for _, path in sorted(ready)]
+
+    def mark_done(self, paths):
+        """Do not report ``paths`` again until they change."""
+        for path in paths:
+            seen = self.pending.pop(path, None)
+            if seen is not None:
+                self.done[path] = seen[0]
+
+
+def _normalized(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def merge_output_paths(target):
+    """Every file a merge into ``target`` may write next to it.
+
+    All output and delta formats are listed, not only the selected ones,
+    so switching formats never feeds an old export back into the merge.
+    """
+    paths = [output_path(target, fmt) for fmt in OUTPUT_FORMAT_CHOICES]
+    paths += [
+        delta_path(target, kind, fmt)
+        for kind in DELTA_KINDS for fmt in DELTA_FORMATS
+    ]
+    paths.append(state_path(target))
+    return paths
+
+
+# ============================================================
+# WATCH LOOP
+# ============================================================
+
+def watch_folder(folder, target, options=None, interval=WATCH_INTERVAL,
+                 settle=SETTLE_SECONDS, skip_existing=False,
+                 on_merge=None, on_error=None, stop=None):
+    """Merge files landing in ``folder`` into ``target`` until ``stop`` is set.
+
+    Every batch of settled files goes through the incremental merge
+    (sidecar store next to ``target``), so only the new rows are parsed
+    and outputs are rewritten only when the catalogue changed. The
+    merge's own outputs (see :func:`merge_output_paths`) are ignored.
+    ``on_merge(files, result)`` is called after each merge. ``on_error``
+    receives the exception: a :class:`MergeError` skips the offending file
+    until it changes again. Any other error, e.g. an output locked by Excel,
+    retries the batch on the next poll (reported once per distinct message).
+    ``stop`` is a ``threading.Event``.
+    """
+    options = replace(options or MergeOptions(), incremental=True)
+    # A target inside the drop folder must not re-ingest its own exports
+    drop = DropFolder(
+        folder, settle=settle, skip_existing=skip_existing,
+        exclude=merge_output_paths(target)
+    )
+    stop = stop or threading.Event()
+    last_error = None
+
+    while not stop.is_set():
+        files = drop.poll()
+        if files:
+            try:
+                result = merge_files(files, target, options)
+            except MergeError as e:
+                drop.mark_done([e.path])
+                last_error = None
+                if on_error is not None:
+                    on_error(e)
+                continue  # merge the remaining files right away
+            except Exception as e:
+                if on_error is not None and str(e) != last_error:
+                    on_error(e)
+                last_error = str(e)
+            else:
+                drop.mark_done(files)
+                last_error = None
+                if on_merge is not None:
+                    on_merge(files, result)
+        stop.wait(interval)
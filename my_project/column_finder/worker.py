@@ -0,0 +1,83 @@
+import queue
+import threading
+
+from .engine import merge_files
+from .errors import MergeCancelled
+from .watch import watch_folder
+
+
+class MergeWorker(threading.Thread):
+    """Run :func:`merge_files` off the UI thread.
+
+    Messages are put on ``self.messages`` as ``(kind, payload)`` tuples:
+    ``("progress", Progress)`` while running, then exactly one of
+    ``("done", MergeResult)``, ``("error", exception)`` or
+    ``("cancelled", None)``. The UI drains the queue from its own thread
+    (``root.after`` polling in Tk) and calls :meth:`cancel` to stop early.
+    """
+
+    def __init__(self, files, target, options):
+        super().__init__(daemon=True)
+        self.files = list(files)
+        self.target = target
+        self.options = options
+        self.messages = queue.Queue()
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            result = merge_files(
+                self.files,
+                self.target,
+                self.options,
+                progress=lambda p: self.messages.put(("progress", p)),
+                cancel=self.cancel_event,
+            )
+        except MergeCancelled:
+            self.messages.put(("cancelled", None))
+        except Exception as e:
+            self.messages.put(("error", e))
+        else:
+            self.messages.put(("done", result))
+
+
+class WatchWorker(threading.Thread):
+    """Run :func:`~column_finder.watch.watch_folder` off the UI thread.
+
+    Puts ``("merged", (files, MergeResult))`` and ``("error", exception)``
+    on ``self.messages`` and a final ``("stopped", None)`` once
+    :meth:`stop` was called (or the folder could no longer be read).
+    """
+
+    def __init__(self, folder, target, options, **watch_kwargs):
+        super().__init__(daemon=True)
+        self.folder = folder
+        self.target = target
+        self.options = options
+        self.watch_kwargs = watch_kwargs
+        self.messages = queue.Queue()
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        try:
+            watch_folder(
+                self.folder,
+                self.target,
+                self.options,
+                on_merge=lambda files, result: self.messages.put(
+                    ("merged", (files, result))
+                ),
+                on_error=lambda e: self.messages.put(("error", e)),
+                stop=self.stop_event,
+                **self.watch_kwargs
+            )
+        except Exception as e:
+            self.messages.put(("error", e))
+        finally:
+            self.messages.put(("stopped", None))
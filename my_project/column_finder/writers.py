@@ -0,0 +1,153 @@
+import os
+
+from .arrow_io import ARROW_KINDS, has_pyarrow, write_arrow
+from .config import DICTIONARY_COLUMNS, SEPARATOR
+
+
+# ============================================================
+# OUTPUT PATHS
+# ============================================================
+
+def output_path(target, fmt):
+    """Return the file written for ``fmt`` next to the target XLSX."""
+    if fmt == "xlsx":
+        return target
+    return os.path.splitext(target)[0] + "." + fmt
+
+
+# ============================================================
+# WRITERS
+# ============================================================
+
+XLSX_CHUNK_ROWS = 50_000
+
+
+def _iter_rows(df, chunk_rows=XLSX_CHUNK_ROWS):
+    """Yield ``df`` rows as tuples, converting one chunk at a time.
+
+    Missing values become ``None`` (empty cells); text such as "12,50" is
+    passed through untouched so it stays a text cell with its comma.
+    """
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        yield from chunk.itertuples(index=False, name=None)
+
+
+def write_xlsx_pandas(df, path, options):
+    """In-memory openpyxl workbook via ``DataFrame.to_excel``."""
+    df.to_excel(path, index=False, engine="openpyxl")
+
+
+def write_xlsx_openpyxl(df, path, options):
+    """Streaming openpyxl write-only workbook (rows are not kept)."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append([str(c) for c in df.columns])
+    for row in _iter_rows(df):
+        ws.append(row)
+    wb.save(path)
+
+
+def write_xlsx_xlsxwriter(df, path, options):
+    """Streaming xlsxwriter workbook in ``constant_memory`` mode."""
+    import xlsxwriter
+
+    wb = xlsxwriter.Workbook(path, {
+        "constant_memory": True,
+        # Keep every value as written by the merge (no URL/formula magic)
+        "strings_to_urls": False,
+        "strings_to_formulas": False,
+        "strings_to_numbers": False,
+    })
+    try:
+        ws = wb.add_worksheet("Sheet1")
+        ws.write_row(0, 0, [str(c) for c in df.columns])
+        for r, row in enumerate(_iter_rows(df), start=1):
+            ws.write_row(r, 0, row)
+    finally:
+        wb.close()
+
+
+XLSX_WRITERS = {
+    "pandas": write_xlsx_pandas,
+    "openpyxl": write_xlsx_openpyxl,
+    "xlsxwriter": write_xlsx_xlsxwriter,
+}
+
+
+def xlsx_writer_name(name="auto"):
+    """Resolve "auto" to xlsxwriter when installed, else openpyxl write-only."""
+    if name != "auto":
+        return name
+    try:
+        import xlsxwriter  # noqa: F401
+    except ImportError:
+        return "openpyxl"
+    return "xlsxwriter"
+
+
+def write_xlsx(df, path, options):
+    name = xlsx_writer_name(options.xlsx_writer)
+    if name not in XLSX_WRITERS:
+        raise ValueError(f"Unknown XLSX writer: {name}")
+    XLSX_WRITERS[name](df, path, options)
+
+
+def write_csv(df, path, options):
+    df.to_csv(
+        path,
+        sep=SEPARATOR,
+        index=False,
+        encoding=options.output_csv_encoding
+    )
+
+
+def write_parquet(df, path, options):
+    write_arrow(df, path, "parquet", DICTIONARY_COLUMNS)
+
+
+def write_feather(df, path, options):
+    write_arrow(df, path, "feather", DICTIONARY_COLUMNS)
+
+
+WRITERS = {
+    "xlsx": write_xlsx,
+    "csv": write_csv,
+    "parquet": write_parquet,
+    "feather": write_feather,
+}
+
+
+def check_outputs(formats):
+    """Fail before any input is read if an output format cannot be written."""
+    for fmt in formats:
+        if fmt not in WRITERS:
+            raise ValueError(f"Unknown output format: {fmt}")
+        if fmt in ARROW_KINDS and not has_pyarrow():
+            raise ValueError(
+                f"{ARROW_KINDS[fmt]} output needs the pyarrow package "
+                f"(pip install pyarrow)"
+            )
+
+
+def write_output(df, target, fmt, options):
+    """Write ``df`` in ``fmt`` next to ``target`` and return the path."""
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown output format: {fmt}")
+    path = output_path(target, fmt)
+    WRITERS[fmt](df, path, options)
+    return path
+
+
+def write_outputs(df, target, options):
+    """Write ``df`` to every format in ``options.outputs``.
+
+    Returns a dict of format -> written path.
+    """
+    return {
+        fmt: write_output(df, target, fmt, options)
+        for fmt in options.outputs
+    }
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Make column_finder importable when pytest is run from any directory
+# (the package lives next to the GUI scripts and is not installed)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
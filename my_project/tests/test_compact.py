@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from column_finder import MergeOptions, merge_files, merge_frames
+from column_finder.arrow_io import _arrow_ready
+from column_finder.config import DICTIONARY_COLUMNS
+
+
+def _write_inputs(folder):
+    """CSV with VAT "23" and an XLSM with numeric VAT 0.23."""
+    from openpyxl import Workbook
+
+    csv = folder / "in0.csv"
+    csv.write_text(
+        "Kod;ProduktNazwa;CenaBrutto;VAT\n"
+        + "".join(f"K{i};Produkt {i % 3};{i},50;23\n" for i in range(20)),
+        encoding="utf-8",
+    )
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Kod", "ProduktNazwa", "CenaBrutto", "VAT"])
+    for i in range(10, 30):
+        ws.append([f"K{i}", f"Produkt {i % 3}", i + 0.5, 0.23])
+    xlsm = folder / "x.xlsm"
+    wb.save(xlsm)
+    return [str(csv), str(xlsm)]
+
+
+def test_mixed_vat_is_not_categorized(tmp_path):
+    files = _write_inputs(tmp_path)
+    df = merge_frames(
+        files, None, MergeOptions(include_target=False, compact=True)
+    )
+    assert not isinstance(df["VAT"].dtype, pd.CategoricalDtype)
+    assert set(df["VAT"]) == {"23", 0.23}
+    # Text-only columns are still compacted
+    assert isinstance(df["ProduktNazwa"].dtype, pd.CategoricalDtype)
+
+
+def test_arrow_ready_stringifies_mixed_categories():
+    df = pd.DataFrame({"VAT": pd.Categorical(["23", 0.23, "23"])})
+    ready = _arrow_ready(df, DICTIONARY_COLUMNS)
+    assert list(ready["VAT"].cat.categories) == ["0.23", "23"]
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_xlsm_and_csv_to_arrow(tmp_path, fmt):
+    pytest.importorskip("pyarrow")
+    files = _write_inputs(tmp_path)
+    target = str(tmp_path / "wynik.xlsx")
+    options = MergeOptions(include_target=False, outputs=(fmt,), compact=True)
+    result = merge_files(files, target, options)
+    read = pd.read_parquet if fmt == "parquet" else pd.read_feather
+    df = read(result.outputs[fmt])
+    assert len(df) == 30
+    assert set(df["VAT"].astype(str)) == {"23", "0.23"}
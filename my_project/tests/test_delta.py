@@ -0,0 +1,56 @@
+import json
+
+import pandas as pd
+import pytest
+
+from column_finder.delta import (
+    compute_delta,
+    load_state,
+    row_hashes,
+    save_state,
+    state_path,
+)
+
+COLUMNS = ["Kod", "Cena"]
+
+
+def test_hash_collision_is_resolved_on_the_codes():
+    df = pd.DataFrame({"Kod": ["C", "B"], "Cena": ["1,00", "2,00"]})
+    state = row_hashes(df, COLUMNS)
+    # "A" from the last run collides with the new code "C"
+    previous = pd.DataFrame({
+        "Kod": ["A", "B"],
+        "key_hash": state["key_hash"].to_numpy(),
+        "hash": state["hash"].to_numpy(),
+    })
+    frames, _ = compute_delta(df, previous, COLUMNS)
+    assert frames["added"]["Kod"].tolist() == ["C"]
+    assert frames["changed"].empty
+    assert frames["removed"]["Kod"].tolist() == ["A"]
+
+
+def test_state_round_trips_as_versioned_json(tmp_path):
+    target = str(tmp_path / "wynik.xlsx")
+    df = pd.DataFrame({"Kod": ["K1", "K2"], "Cena": ["1,00", "2,00"]})
+    _, state = compute_delta(df, None, COLUMNS)
+    save_state(target, state, COLUMNS)
+    with open(state_path(target), encoding="utf-8") as f:
+        assert json.load(f)["version"] == 1
+
+    df.loc[1, "Cena"] = "3,00"
+    frames, _ = compute_delta(df, load_state(target, COLUMNS), COLUMNS)
+    assert frames["added"].empty
+    assert frames["changed"]["Kod"].tolist() == ["K2"]
+
+    # Other compared columns: rows cannot be compared, all count as changed
+    previous = load_state(target, COLUMNS + ["VAT"])
+    frames, _ = compute_delta(df, previous, COLUMNS)
+    assert frames["changed"]["Kod"].tolist() == ["K1", "K2"]
+
+
+def test_unknown_state_version_is_rejected(tmp_path):
+    target = str(tmp_path / "wynik.xlsx")
+    with open(state_path(target), "w", encoding="utf-8") as f:
+        json.dump({"format": "column_finder.delta-state", "version": 99}, f)
+    with pytest.raises(ValueError, match="delta state"):
+        load_state(target, COLUMNS)
@@ -0,0 +1,37 @@
+import pytest
+
+from column_finder import MergeOptions, read_input
+from column_finder.encoding import SAMPLE_BYTES, sniff_encoding
+
+HEADER = "Kod;ProduktNazwa;Cena;VAT\n"
+
+
+def _rows(count, name="Jablko"):
+    return "".join(f"K{i};{name};1,00;23\n" for i in range(count))
+
+
+# Enough ASCII rows on both sides to keep the middle out of the samples
+PADDING = SAMPLE_BYTES // 20 * 3
+
+
+@pytest.mark.parametrize("text, encoding, expected", [
+    (HEADER + _rows(3, "Żółć"), "cp1250", "cp1250"),
+    (HEADER + _rows(3, "Żółć"), "utf-8", "utf-8"),
+    (HEADER + _rows(3, "Żółć"), "utf-8-sig", "utf-8-sig"),
+    (HEADER + _rows(3), "cp1250", None),
+    (HEADER + _rows(PADDING) + "K;Żółć;2,00;8\n" + _rows(PADDING), "cp1250", "cp1250"),
+    (HEADER + _rows(PADDING) + "K;Żółć;2,00;8\n" + _rows(PADDING), "utf-8", "utf-8"),
+], ids=["cp1250", "utf-8", "utf-8-sig", "ascii", "cp1250-middle", "utf-8-middle"])
+def test_sniff_encoding(tmp_path, text, encoding, expected):
+    path = tmp_path / "in.csv"
+    path.write_bytes(text.encode(encoding))
+    assert sniff_encoding(str(path)) == expected
+
+
+def test_polish_characters_in_the_middle_survive(tmp_path):
+    # TXT defaults to utf-8, which would replace every cp1250 letter
+    path = tmp_path / "eksport.txt"
+    text = _rows(PADDING) + "K;Żółć;2,00;8\n" + _rows(PADDING)
+    path.write_bytes(text.encode("cp1250"))
+    df = read_input(str(path), MergeOptions(txt_column_indexes=[0, 1, 2, 3]))
+    assert "Żółć" in set(df["ProduktNazwa"])
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from column_finder.engine import NewestRowCollector, dedupe_newest
+
+COLUMNS = ["Kod", "ProduktNazwa", "Cena", "VAT"]
+
+
+def _random_frame(rng, rows, codes):
+    return pd.DataFrame({
+        "Kod": [f"K{i}" for i in rng.integers(0, codes, rows)],
+        "ProduktNazwa": [f"P{i}" for i in rng.integers(0, 5, rows)],
+        "Cena": [f"{i},00" for i in rng.integers(0, 1000, rows)],
+        "VAT": rng.choice(["23", "8", "5", ""], rows),
+    })
+
+
+def _chunks(rng, df):
+    """Split ``df`` into random consecutive chunks, empty ones included."""
+    cuts = np.sort(rng.integers(0, len(df) + 1, rng.integers(0, 8)))
+    bounds = [0, *cuts, len(df)]
+    return [df.iloc[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("seed", range(30))
+def test_collector_matches_dedupe_newest(seed, compact):
+    rng = np.random.default_rng(seed)
+    df = _random_frame(rng, int(rng.integers(1, 300)), int(rng.integers(1, 120)))
+    collector = NewestRowCollector(
+        COLUMNS, compact_rows=int(rng.integers(1, 50)), compact=compact
+    )
+    for chunk in _chunks(rng, df):
+        collector.add(chunk)
+
+    result = collector.frame()
+    expected = dedupe_newest(df)
+    if compact:
+        result = result.astype(object)
+        expected = expected.astype(object)
+    pd.testing.assert_frame_equal(result, expected, check_index_type=False)
+    assert result.index.tolist() == expected.index.tolist()
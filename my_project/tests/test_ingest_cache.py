@@ -0,0 +1,12 @@
+import hashlib
+
+from column_finder import ingest_cache
+
+
+def test_file_digest_reads_in_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest_cache, "DIGEST_BLOCK", 7)
+    data = bytes(range(256)) * 3
+    path = tmp_path / "in.csv"
+    path.write_bytes(data)
+    expected = hashlib.blake2b(data, digest_size=16).hexdigest()
+    assert ingest_cache.file_digest(str(path)) == expected
@@ -0,0 +1,21 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from column_finder.pools import bounded_map
+
+
+def test_bounded_map_limits_jobs_ahead():
+    lock = threading.Lock()
+    started = []
+
+    def job(i):
+        with lock:
+            started.append(i)
+        return i * 2
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = bounded_map(pool, job, ((i,) for i in range(100)), 3)
+        assert next(results) == 0
+        # One result taken: at most 3 more jobs submitted
+        assert len(started) <= 4
+        assert list(results) == [i * 2 for i in range(1, 100)]
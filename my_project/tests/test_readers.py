@@ -0,0 +1,118 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+from column_finder import MergeOptions, read_input, readers
+from column_finder.cli import build_parser
+from column_finder.excel_reader import SheetReader
+from column_finder.readers import (
+    fuzzy_column_mapping,
+    max_field_count,
+    read_txt,
+    read_txt_lines,
+    strict_column_mapping,
+)
+
+
+@pytest.fixture
+def numeric_header_xlsm(tmp_path):
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Kod", 2024, "ProduktNazwa", "CenaBrutto", " VAT "])
+    ws.append(["K1", 5, "Jabłko", 1.5, 23])
+    path = tmp_path / "cennik.xlsm"
+    wb.save(path)
+    return str(path)
+
+
+@pytest.mark.parametrize("excel_reader", ["auto", "pandas"])
+def test_numeric_header_cell(numeric_header_xlsm, excel_reader):
+    df = read_input(numeric_header_xlsm, MergeOptions(excel_reader=excel_reader))
+    assert list(df.columns) == ["Kod", "ProduktNazwa", "Cena", "VAT"]
+    assert df.iloc[0].tolist() == ["K1", "Jabłko", 1.5, 23]
+
+
+def test_mapping_accepts_non_string_headers():
+    columns = ["Kod", 2024, None, " VAT "]
+    mapped, missing = fuzzy_column_mapping(columns, ["Kod", "VAT", "Cena"])
+    assert mapped == {"Kod": "Kod", " VAT ": "VAT", "Cena": "Cena"}
+    assert missing == ["Cena"]
+    mapped, missing = strict_column_mapping(columns, ["Kod", "VAT"])
+    assert mapped == {"Kod": "Kod", " VAT ": "VAT"}
+    assert missing == []
+
+
+def test_calamine_reads_like_openpyxl(tmp_path):
+    pytest.importorskip("python_calamine")
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.append([])
+    ws.append([None, "Kod", "Kod", "Cena", None, "Data", "VAT"])
+    ws.append([None, "K1", "x", 1.5, None, datetime.date(2024, 1, 2), 23])
+    ws.append([None, "K2", "y", 2, None, datetime.datetime(2024, 1, 2, 3, 4), "23%"])
+    ws.append([])
+    ws.append([None, None, "z", None, None, None, 0.23])
+    ws.append([None, "K4", 7, "", None, None, None])
+    ws.append([])
+    path = tmp_path / "cennik.xlsx"
+    wb.save(path)
+
+    frames = {}
+    for engine in ("openpyxl", "calamine"):
+        with SheetReader(str(path), engine) as sheet:
+            frames[engine] = sheet.read(list(sheet.header))
+    pd.testing.assert_frame_equal(frames["calamine"], frames["openpyxl"])
+    assert frames["openpyxl"]["Kod"].tolist()[:2] == ["K1", "K2"]
+
+
+@pytest.mark.parametrize("command", [["merge", "in.xlsm"], ["watch", "drop", "-t", "t.xlsx"]])
+def test_excel_reader_option(command):
+    args = build_parser().parse_args(command + ["--excel-reader", "pandas"])
+    assert args.excel_reader == "pandas"
+
+
+TXT_CASES = [
+    "K1;x;1,00;23\nK2;y\nK3;z;3,00;8;extra;fields\n;\n\nK4",
+    "K1;x;1\r\nK2;y;2;8\rK3\r\r\n;;;;;\r",
+    # Runs of bare '\r' next to a quote overflow the C tokenizer
+    '1ab\r;;b";"\n\r\n\r\r\n;;\rb\n\na\n;a;;; \r\nąb\n \r\rąa',
+]
+
+
+@pytest.mark.parametrize("chunksize", [0, 2])
+@pytest.mark.parametrize("text", TXT_CASES)
+def test_read_txt_matches_line_loop(tmp_path, text, chunksize):
+    path = tmp_path / "eksport.txt"
+    path.write_bytes(text.encode("utf-8"))
+    options = MergeOptions(txt_encoding="utf-8", chunksize=chunksize)
+    pd.testing.assert_frame_equal(
+        read_txt(str(path), options), read_txt_lines(str(path), options)
+    )
+
+
+def test_read_txt_falls_back_after_parsed_chunks(tmp_path, monkeypatch):
+    path = tmp_path / "eksport.txt"
+    path.write_bytes("".join(f"K{i};x;{i};23\n" for i in range(5)).encode())
+    chunked = readers._chunked
+
+    def failing(reader):
+        for chunk in chunked(reader):
+            yield chunk
+            raise pd.errors.ParserError("Buffer overflow caught")
+
+    monkeypatch.setattr(readers, "_chunked", failing)
+    options = MergeOptions(txt_encoding="utf-8", chunksize=2)
+    assert [len(c) for c in readers.read_txt_chunks(str(path), options)] == [2, 2, 1]
+    assert read_txt(str(path), options)["Kod"].tolist() == [f"K{i}" for i in range(5)]
+
+
+def test_max_field_count_splits_lines_on_cr(tmp_path):
+    path = tmp_path / "eksport.txt"
+    path.write_bytes(b"a;b\rc;d\r\ne;f\r;")
+    assert max_field_count(str(path)) == 2
+    assert max_field_count(str(path), block_size=3) == 2
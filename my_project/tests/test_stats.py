@@ -0,0 +1,23 @@
+import time
+
+import numpy as np
+import pytest
+
+from column_finder.stats import RunPeakRss, current_rss
+
+MB = 2**20
+
+
+@pytest.mark.skipif(current_rss() is None, reason="RSS is not available")
+def test_run_peak_is_not_the_lifetime_peak():
+    with RunPeakRss() as large:
+        data = np.ones(400 * MB, dtype=np.uint8)
+        del data
+
+    with RunPeakRss() as small:
+        data = np.ones(50 * MB, dtype=np.uint8)
+        time.sleep(0.2)
+        del data
+
+    assert large.peak - small.peak > 250 * MB
+    assert small.peak >= 50 * MB
@@ -0,0 +1,134 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from column_finder import MergeCancelled, MergeOptions, merge_files
+from column_finder.store import CatalogueStore, store_path
+
+HEADER = "Kod;ProduktNazwa;Cena;VAT\n"
+
+
+def _csv(path, rows):
+    path.write_text(HEADER + "".join(f"{row}\n" for row in rows), encoding="utf-8")
+    return str(path)
+
+
+def _read(path):
+    return pd.read_csv(path, sep=";", dtype=str, keep_default_na=False)
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    return [
+        _csv(tmp_path / "a.csv", ["K1;Jabłko;1,00;23", "K2;Gruszka;2,00;8",
+                                  "K3;Śliwka;3,00;5"]),
+        _csv(tmp_path / "b.csv", ["K2;Gruszka;2,50;8", "K4;Wiśnia;4,00;23",
+                                  "K2;Gruszka;2,60;8"]),
+        _csv(tmp_path / "c.csv", ["K1;Jabłko;1,00;23", "K5;Morela;5,00;5",
+                                  "K3;Śliwka;3,10;23"]),
+    ]
+
+
+def test_seeded_incremental_run_matches_full_merge(tmp_path, inputs):
+    full = str(tmp_path / "full.xlsx")
+    merge_files(inputs, full, MergeOptions(outputs=("csv",), include_target=False))
+
+    # The first file is merged the classic way, the store is seeded from
+    # that XLSX and the other files are upserted
+    target = str(tmp_path / "wynik.xlsx")
+    merge_files(inputs[:1], target, MergeOptions(include_target=False))
+    result = merge_files(inputs[1:], target, MergeOptions(incremental=True))
+    assert result.changed > 0
+
+    expected = _read(tmp_path / "full.csv").sort_values("Kod", ignore_index=True)
+    exported = _read(tmp_path / "wynik.csv").sort_values("Kod", ignore_index=True)
+    pd.testing.assert_frame_equal(exported, expected)
+    with CatalogueStore(store_path(target), list(expected.columns)) as store:
+        stored = store.frame().sort_values("Kod", ignore_index=True)
+    pd.testing.assert_frame_equal(stored, expected)
+
+
+def test_unchanged_rows_do_not_touch_the_store(tmp_path, inputs):
+    target = str(tmp_path / "wynik.xlsx")
+    options = MergeOptions(incremental=True, outputs=("csv",))
+    merge_files(inputs, target, options)
+    with CatalogueStore(store_path(target), options.columns) as store:
+        version = store.version
+        seqs = dict(store.conn.execute('SELECT "Kod", seq FROM catalogue'))
+
+    result = merge_files(inputs[2:], target, options)
+    assert result.changed == 0
+    assert not result.outputs
+    with CatalogueStore(store_path(target), options.columns) as store:
+        assert store.version == version
+        assert dict(store.conn.execute('SELECT "Kod", seq FROM catalogue')) == seqs
+
+
+def test_cancel_rolls_back_the_upsert(tmp_path, inputs):
+    target = str(tmp_path / "wynik.xlsx")
+    options = MergeOptions(incremental=True, outputs=("csv",))
+    merge_files(inputs[:1], target, options)
+    with CatalogueStore(store_path(target), options.columns) as store:
+        before = store.frame()
+        version = store.version
+
+    # Cancelled once every file is read: the upsert runs, then is undone
+    cancel = threading.Event()
+
+    def progress(p):
+        if p.stage == "dedupe":
+            cancel.set()
+
+    with pytest.raises(MergeCancelled):
+        merge_files(inputs[1:], target, options, progress=progress, cancel=cancel)
+    with CatalogueStore(store_path(target), options.columns) as store:
+        pd.testing.assert_frame_equal(store.frame(), before)
+        assert store.version == version
+
+
+def test_upsert_orders_by_seq_and_keeps_provenance(tmp_path):
+    columns = ["Kod", "Cena"]
+    with CatalogueStore(str(tmp_path / "s.sqlite"), columns) as store:
+        store.upsert(pd.DataFrame({"Kod": ["K1", "K2", "K1"],
+                                   "Cena": ["1", "2", "3"]}), "a.csv")
+        store.commit()
+        # K2 unchanged keeps its place and provenance; K3 is new
+        store.upsert(pd.DataFrame({"Kod": ["K2", "K3"], "Cena": ["2", "4"]}),
+                     "b.csv")
+        store.commit()
+
+        assert store.frame().values.tolist() == [["K3", "4"], ["K1", "3"], ["K2", "2"]]
+        assert store.lookup("K1")["Cena"] == "3"
+        assert store.lookup("K2")["source"] == "a.csv"
+        assert store.lookup("K3")["source"] == "b.csv"
+        assert store.lookup("K9") is None
+
+
+@pytest.mark.parametrize("chunksize", [0, 1])
+def test_history_records_one_row_per_change(tmp_path, chunksize):
+    target = str(tmp_path / "wynik.xlsx")
+    options = MergeOptions(incremental=True, history=True, outputs=("csv",),
+                           chunksize=chunksize)
+    # Changes inside one file, identical repeats and a name-only change
+    merge_files([_csv(tmp_path / "a.csv", [
+        "K1;Jabłko;1,00;23", "K2;Gruszka;2,00;8", "K2;Gruszka;2,00;8",
+        "K2;Gruszka;2,50;8", "K2;Gruszka nowa;2,50;8",
+    ])], target, options)
+    merge_files([_csv(tmp_path / "b.csv", [
+        "K1;Jabłko;1,00;23", "K2;Gruszka;2,50;8", "K2;Gruszka;2,00;5",
+    ])], target, options)
+
+    with CatalogueStore(store_path(target), options.columns) as store:
+        k1 = store.history("K1")
+        k2 = store.history("K2")
+    changes = ["old_Cena", "new_Cena", "old_VAT", "new_VAT"]
+    assert k1[changes].values.tolist() == [["", "1,00", "", "23"]]
+    assert k2[changes].values.tolist() == [
+        ["", "2,00", "", "8"],
+        ["2,00", "2,50", "8", "8"],
+        ["2,50", "2,00", "8", "5"],
+    ]
+    assert k2["source"].tolist() == [
+        str(tmp_path / "a.csv"), str(tmp_path / "a.csv"), str(tmp_path / "b.csv")
+    ]
@@ -0,0 +1,52 @@
+import threading
+
+from column_finder import MergeOptions, watch_folder
+from column_finder.cli import _merge_options, build_parser
+from column_finder.watch import DropFolder, merge_output_paths
+
+
+def test_drop_folder_skips_merge_outputs(tmp_path):
+    target = str(tmp_path / "wynik.xlsx")
+    for path in merge_output_paths(target):
+        open(path, "w").close()
+    (tmp_path / "in.csv").write_text("Kod;Cena\nK1;1\n", encoding="utf-8")
+    drop = DropFolder(str(tmp_path), settle=0, exclude=merge_output_paths(target))
+    drop.poll()
+    assert drop.poll() == [str(tmp_path / "in.csv")]
+
+
+def test_watch_does_not_reingest_its_outputs(tmp_path):
+    (tmp_path / "in.csv").write_text("Kod;Cena\nK1;1,00\n", encoding="utf-8")
+    target = str(tmp_path / "wynik.xlsx")
+    options = MergeOptions(outputs=("csv",), delta="csv")
+    merged = []
+    stop = threading.Event()
+
+    def on_merge(files, result):
+        merged.append(files)
+        if len(merged) > 1:
+            stop.set()
+
+    thread = threading.Thread(
+        target=watch_folder,
+        args=(str(tmp_path), target),
+        kwargs=dict(options=options, interval=0.05, settle=0,
+                    on_merge=on_merge, stop=stop),
+    )
+    thread.start()
+    stop.wait(1.5)
+    stop.set()
+    thread.join()
+    assert merged == [[str(tmp_path / "in.csv")]]
+
+
+def test_watch_accepts_the_merge_tuning_options():
+    args = build_parser().parse_args([
+        "watch", "drop", "-t", "wynik.xlsx", "-j", "4", "--executor", "thread",
+        "--no-header-cache", "--chunksize", "1000", "--ingest-cache", "--history",
+    ])
+    options = _merge_options(args)
+    assert (options.workers, options.executor, options.chunksize) == (4, "thread", 1000)
+    assert options.header_cache is None
+    assert options.ingest_cache is not None
+    assert options.history